@@ -3,129 +3,348 @@ from flask import Flask, jsonify, Response, request, abort
 import os
 import numpy as np
 import pandas as pd
-import joblib
-from tensorflow.keras.models import load_model
 from datetime import datetime
-from collections import OrderedDict
+import functools
+import hashlib
+import html
+import io
 import secrets
+import threading
+import time
+import weakref
 
-#------------------- DEFINIÇÃO DE FUNÇÕES ----------------------+
-def transform_new(df_new, scaler, encoder, feature_cols):
-    df = df_new.copy()
-    yes_no_cols = ['Col01','Col02','Col03','Col04','Col05','Col06',
-                   'Col07','Col08','Col09','Col10','Col14','Col16']
-    for col in yes_no_cols:
-        if col in df.columns:
-            df[col] = df[col].map({'Sim': 1, 'Não': 0}).astype('int8')
-            
-    df.replace("?", np.nan, inplace=True)
-    
-    if 'Col12' in df.columns:
-        df['Col12'] = df['Col12'].map({'Masculino': 0, 'Feminino': 1}).astype('int8')
-        
-    if 'Col11' in df.columns:
-        df[['Col11']] = scaler.transform(df[['Col11']].astype(float))
-                
-    categorical_cols = ['Col13', 'Col15', 'Col17']
-    for c in categorical_cols:
-        if c in df.columns:
-            df[c] = df[c].fillna('missing')
-            
-    present_cats = [c for c in categorical_cols if c in df.columns]
-    if present_cats:
-        encoded = encoder.transform(df[present_cats])
-        feature_names = encoder.get_feature_names_out(present_cats)
-        df = df.drop(columns=present_cats).reset_index(drop=True)
-        df = pd.concat([df, pd.DataFrame(encoded, columns=feature_names)], axis=1)
-        
-    df = df.reindex(columns=feature_cols, fill_value=0)
-    return df
-#---------------- FIM DE DEFINIÇÃO DE FUNÇÕES ----------------+
+from form_store import COLUNA_CARIMBO, FormDataStore
+from pipeline import (CATEGORICAL_COLS, NON_FINITE_ERROR, YES_NO_COLS, rename_form_columns,
+                      require_finite, score_finite_rows, score_predictions)
+from artifacts import load_artifacts, load_serving_artifacts
+from artifact_registry import ArtifactRegistry
+from result_store import create_result_store
+from memo_cache import FeatureMemoCache
+from micro_batch import BATCH_SIZE_BUCKETS, QUEUE_WAIT_BUCKETS, MicroBatcher
+from metrics import Registry, format_histogram
+from worker_memory import memory_usage
 
 app = Flask(__name__)
 
 # Configuração de segurança
 TOKEN_ACESSO = 'TEA12345'  # Token fixo para acesso básico
-
-# Dicionário (Mem. Ram) para armazenar resultados
-resultados = OrderedDict()
-MAX_RESULTADOS = 5000
+# Token do endpoint de ingestão (/ingest); vazio = desabilitado
+INGEST_TOKEN = os.environ.get('INGEST_TOKEN', '')
+COLUNAS_RESPOSTA = sorted(YES_NO_COLS + ['Col11', 'Col12'] + CATEGORICAL_COLS)
 
 # Configuração de caminhos
 BASE_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
-SCALER_PATH = os.path.join(BASE_DIR, 'scaler.pkl')
-ENCODER_PATH = os.path.join(BASE_DIR, 'encoder.pkl')
-FEATURE_COLS_PATH = os.path.join(BASE_DIR, 'feature_cols.csv')
-MODEL_PATH = os.path.join(BASE_DIR, 'meu_modelo_TEA.keras')
-THRESHOLD_PATH = os.path.join(BASE_DIR, 'threshold.pkl')
-PARAMETROS_PATH = os.path.join(BASE_DIR, 'parametros_ppv.pkl')
-
-# Carrega modelo e pré-processadores
-scaler = joblib.load(SCALER_PATH)
-encoder = joblib.load(ENCODER_PATH)
-feature_cols = pd.read_csv(FEATURE_COLS_PATH, header=None).iloc[:, 0].tolist()
-model = load_model(MODEL_PATH)
-t_o = joblib.load(THRESHOLD_PATH)
-parametros_ppv = joblib.load(PARAMETROS_PATH)
+
+# Backend de inferência: 'keras' (padrão) ou 'numpy' (sem TensorFlow)
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'keras').lower()
+# Com INFERENCE_VERIFY=1 o backend NumPy é comparado ao Keras e o codificador
+# compilado a transform_new, na carga
+INFERENCE_VERIFY = os.environ.get('INFERENCE_VERIFY', '0') == '1'
+
+# Pacote pré-compilado (python artifacts.py build-bundle): carrega sem TensorFlow
+# nem scikit-learn; é ignorado se estiver desatualizado em relação aos artefatos
+ARTIFACT_BUNDLE = os.environ.get('ARTIFACT_BUNDLE', '')
+# Predição sintética antes de atender (evita o primeiro request lento)
+STARTUP_WARMUP = os.environ.get('STARTUP_WARMUP', '1') == '1'
+
+# Carrega modelo e pré-processadores (versão inicial do registro de artefatos,
+# criado mais abaixo; as rotas usam sempre registry.current)
+artefatos_iniciais, relatorio_inicializacao = load_serving_artifacts(
+    BASE_DIR, backend=INFERENCE_BACKEND, verify=INFERENCE_VERIFY,
+    bundle=ARTIFACT_BUNDLE, warmup=STARTUP_WARMUP)
+print(relatorio_inicializacao)
+
+# Agrupamento de predições simultâneas do /predict (micro-batch)------+
+# MICROBATCH=1 ativa; a janela e o tamanho máximo do lote são ajustáveis
+MICROBATCH = os.environ.get('MICROBATCH', '0') == '1'
+MICROBATCH_MAX_SIZE = int(os.environ.get('MICROBATCH_MAX_SIZE', 32))
+MICROBATCH_WINDOW_MS = float(os.environ.get('MICROBATCH_WINDOW_MS', 5))
+
+if MICROBATCH:
+    # Sem modelo padrão: cada versão dos artefatos entra na fila pelo seu
+    # bind() (modelo_de), então uma recarga nunca mistura versões num lote
+    modelo_predicao = MicroBatcher(max_batch_size=MICROBATCH_MAX_SIZE,
+                                   max_wait=MICROBATCH_WINDOW_MS / 1000)
+else:
+    modelo_predicao = None
+
+
+# Fila vinculada de cada versão dos artefatos; chaves fracas: uma versão
+# substituída numa recarga é liberada quando a última requisição termina
+_modelos_vinculados = weakref.WeakKeyDictionary()
+_modelos_lock = threading.Lock()
+
+
+def modelo_de(arts):
+    # Modelo do /predict para uma versão dos artefatos; com micro-batch, as
+    # linhas entram na fila marcadas com o modelo dessa versão
+    if modelo_predicao is None:
+        return arts.model
+    with _modelos_lock:
+        modelo = _modelos_vinculados.get(arts)
+        if modelo is None:
+            # Referencia só o modelo (não arts), senão a chave nunca é liberada
+            modelo = _modelos_vinculados[arts] = modelo_predicao.bind(
+                functools.partial(arts.model.predict, verbose=0))
+        return modelo
+#---------------------------------------------------------------------+
+
+# Métricas (expostas em /metrics no formato do Prometheus)------------+
+metricas = Registry()
+ETAPAS = metricas.histogram(
+    'tea_predict_stage_seconds', 'Duração de cada etapa do pipeline do /predict.', ['stage'])
+CACHE_RESULTADOS = metricas.counter(
+    'tea_result_cache_requests_total', 'Consultas ao cache de resultados.', ['result'])
+ERROS = metricas.counter(
+    'tea_errors_total', 'Erros por rota e tipo de exceção.', ['route', 'exception'])
+FORM_FETCH_BYTES = metricas.histogram(
+    'tea_form_fetch_bytes', 'Tamanho (bytes) de cada download da planilha.',
+    buckets=(1e3, 1e4, 1e5, 1e6, 5e6, 1e7, 5e7, 1e8))
+FORM_FETCH_LINHAS = metricas.histogram(
+    'tea_form_fetch_rows', 'Linhas de cada download da planilha.',
+    buckets=(100, 1e3, 1e4, 5e4, 1e5, 5e5))
+
+
+def registrar_download(n_bytes, n_linhas, segundos):
+    FORM_FETCH_BYTES.observe(n_bytes)
+    FORM_FETCH_LINHAS.observe(n_linhas)
+    ETAPAS.observe(segundos, stage='form_download')
+
+
+def registrar_erro(rota, erro):
+    ERROS.inc(route=rota, exception=type(erro).__name__)
+
+
+# Memória deste worker (com preload, 'shared' é o que veio do mestre)
+for campo, ajuda in (('rss', 'Memória residente do processo.'),
+                     ('pss', 'Memória proporcional (páginas compartilhadas divididas entre os processos).'),
+                     ('shared', 'Memória residente compartilhada com outros processos.'),
+                     ('private', 'Memória residente exclusiva do processo.')):
+    if campo in memory_usage():
+        metricas.gauge(f'tea_worker_{campo}_bytes', ajuda,
+                       lambda campo=campo: memory_usage().get(campo, 0))
+
+
+if MICROBATCH:
+    @metricas.collector
+    def metricas_micro_batch():
+        e = modelo_predicao.stats()
+        return (
+            ['# HELP tea_microbatch_size Linhas por chamada agrupada ao modelo.',
+             '# TYPE tea_microbatch_size histogram']
+            + format_histogram('tea_microbatch_size', BATCH_SIZE_BUCKETS,
+                               list(e['batch_size_hist'].values()), e['rows'])
+            + ['# HELP tea_microbatch_queue_wait_seconds Espera na fila até a chamada ao modelo.',
+               '# TYPE tea_microbatch_queue_wait_seconds histogram']
+            + format_histogram('tea_microbatch_queue_wait_seconds', QUEUE_WAIT_BUCKETS,
+                               list(e['queue_wait_hist'].values()),
+                               e['queue_wait_mean'] * e['requests'])
+        )
+#---------------------------------------------------------------------+
+
+# Cache de resultados por ID------------------------------------------+
+# RESULT_STORE=memory (padrão, por processo) ou sqlite (arquivo em modo WAL,
+# compartilhado pelos workers e preservado entre reinícios)
+RESULT_STORE = os.environ.get('RESULT_STORE', 'memory').lower()
+RESULT_STORE_PATH = os.environ.get('RESULT_STORE_PATH', os.path.join(BASE_DIR, 'resultados.sqlite3'))
+RESULT_TTL_SECONDS = float(os.environ.get('RESULT_TTL_SECONDS', 0))   # 0 = sem expiração
+MAX_RESULTADOS = int(os.environ.get('MAX_RESULTADOS', 5000))
+
+resultados = create_result_store(RESULT_STORE, RESULT_STORE_PATH,
+                                 max_items=MAX_RESULTADOS,
+                                 ttl=RESULT_TTL_SECONDS,
+                                 version=artefatos_iniciais.version)
+
+metricas.gauge('tea_result_cache_evictions_total', 'Despejos do cache de resultados (LRU) neste processo.',
+               lambda: resultados.evictions, type='counter')
+metricas.gauge('tea_result_cache_entries', 'Entradas no cache de resultados.', lambda: len(resultados))
+#---------------------------------------------------------------------+
+
+
+# Cache por vetor de respostas codificado (hash da linha + versão)------+
+# Padrões de resposta repetidos não passam pelo modelo; 0 = desligado
+MEMO_CACHE_SIZE = int(os.environ.get('MEMO_CACHE_SIZE', 20000))
+memo_cache = FeatureMemoCache(MEMO_CACHE_SIZE, artefatos_iniciais.version) if MEMO_CACHE_SIZE > 0 else None
+
+if memo_cache is not None:
+    metricas.gauge('tea_memo_cache_hits_total', 'Linhas pontuadas a partir do cache por vetor de respostas.',
+                   lambda: memo_cache.hits, type='counter')
+    metricas.gauge('tea_memo_cache_misses_total', 'Linhas que precisaram do modelo.',
+                   lambda: memo_cache.misses, type='counter')
+    metricas.gauge('tea_memo_cache_evictions_total', 'Despejos (LRU) do cache por vetor de respostas.',
+                   lambda: memo_cache.evictions, type='counter')
+    metricas.gauge('tea_memo_cache_hit_ratio', 'Taxa de acerto do cache por vetor de respostas.',
+                   lambda: memo_cache.hit_rate)
+#---------------------------------------------------------------------+
+
+# Registro versionado dos artefatos (recarga sem reiniciar)------------+
+# ARTIFACT_WATCH_SECONDS > 0 observa os arquivos de BASE_DIR; POST
+# /admin/reload (ADMIN_TOKEN) recarrega sob demanda. A recarga usa os
+# artefatos originais (não o pacote .npz) com o backend configurado.
+ARTIFACT_WATCH_SECONDS = float(os.environ.get('ARTIFACT_WATCH_SECONDS', 0))   # 0 = sem observador
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')   # vazio = rota de admin desabilitada
+
+
+def trocar_versao(antigo, novo):
+    # Resultados e cache por vetor de respostas da versão anterior deixam de
+    # valer (no SQLite ficam marcados com a versão antiga até o despejo)
+    resultados.version = novo.version
+    if memo_cache is not None:
+        memo_cache.version = novo.version
+        memo_cache.clear()
+    print(f"Artefatos: versão {antigo.version} substituída por {novo.version}")
+
+
+def carregar_artefatos():
+    # Carga para o registro: a página de resultado do novo t_o também precisa
+    # existir (ValueError mantém a versão atual em uso)
+    novo = load_artifacts(BASE_DIR, backend=INFERENCE_BACKEND, verify=INFERENCE_VERIFY)
+    montar_modelo_resultado(novo.t_o, APP_URL)
+    return novo
 
 
+registry = ArtifactRegistry(
+    artefatos_iniciais, carregar_artefatos, BASE_DIR,
+    poll_interval=ARTIFACT_WATCH_SECONDS, on_swap=trocar_versao)
+
+metricas.gauge('tea_artifact_reloads_total', 'Recargas de artefatos concluídas neste processo.',
+               lambda: registry.reloads, type='counter')
+metricas.gauge('tea_artifact_reload_failures_total', 'Recargas de artefatos que falharam.',
+               lambda: registry.failures, type='counter')
+
+
+@metricas.collector
+def metricas_versao():
+    return ['# HELP tea_artifact_info Versão dos artefatos em uso.',
+            '# TYPE tea_artifact_info gauge',
+            f'tea_artifact_info{{version="{registry.version}"}} 1']
+#---------------------------------------------------------------------+
+
 # Configura a URL base-------------------------------------+
 APP_URL = os.environ.get('APP_URL', 'http://127.0.0.1:5000') 
 #----------------------------------------------------------+
+
+# Cache HTTP das páginas de resultado (validadas por ETag)--+
+RESULT_CACHE_CONTROL = os.environ.get('RESULT_CACHE_CONTROL', 'private, max-age=300')
+#----------------------------------------------------------+
+
+# Fonte das respostas do formulário (URL do CSV ou arquivo local)--------+
+SHEET_ID = "19vZS3gvIQB_rbcixEgTy1rbkvkoeg1ywair4Ags7Rdk"
+FORM_SOURCE_URL = os.environ.get(
+    'FORM_SOURCE_URL',
+    f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/gviz/tq?tqx=out:csv")
+FORM_REFRESH_SECONDS = float(os.environ.get('FORM_REFRESH_SECONDS', 30))
+FORM_MIN_REFRESH_SECONDS = float(os.environ.get('FORM_MIN_REFRESH_SECONDS', 5))
+# FORM_STORE_MODE=index (padrão: planilha em memória, atualizada em segundo
+# plano) ou scan (sem a planilha em memória: cada consulta lê o CSV em blocos
+# de FORM_SCAN_CHUNKSIZE linhas e para ao encontrar o ID)
+FORM_STORE_MODE = os.environ.get('FORM_STORE_MODE', 'index').lower()
+FORM_SCAN_CHUNKSIZE = int(os.environ.get('FORM_SCAN_CHUNKSIZE', 5000))
+
+form_store = FormDataStore(FORM_SOURCE_URL,
+                           refresh_interval=FORM_REFRESH_SECONDS,
+                           min_refresh_interval=FORM_MIN_REFRESH_SECONDS,
+                           on_fetch=registrar_download,
+                           mode=FORM_STORE_MODE,
+                           chunksize=FORM_SCAN_CHUNKSIZE)
+metricas.gauge('tea_form_rows', 'Respostas no índice em memória da planilha.', lambda: len(form_store))
+#-----------------------------------------------------------------------+
 #
 #
 #-------------- Início de função: get_latest_form_data -------------+
 #
 def get_latest_form_data(id_requerido=None):
-    SHEET_ID = "19vZS3gvIQB_rbcixEgTy1rbkvkoeg1ywair4Ags7Rdk"
-    url = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/gviz/tq?tqx=out:csv"
-    df = pd.read_csv(url)
-
-    if df.columns[0] == "Carimbo de data/hora":
-        df.rename(columns={"Carimbo de data/hora": "ID"}, inplace=True)
-
-    df.set_index("ID", inplace=True)
-    
     if id_requerido:
-        # Busca específica por um ID
-        if id_requerido in df.index:
-            return df.loc[[id_requerido]], id_requerido
+        # Busca específica por um ID (no índice em memória)
+        df = form_store.get(id_requerido)
+        if df is not None:
+            return df, id_requerido
         else:
             return None, None
     else:
         # Retorna o último registro (compatibilidade)
-        latest_row = df.tail(1)
-        id_cliente = latest_row.index[0]
-        return latest_row, id_cliente
+        id_cliente = form_store.latest_id()
+        if id_cliente is None:
+            return None, None
+        return form_store.get(id_cliente), id_cliente
 #
 #-------------- Fim de função: get_latest_form_data ---------------+
 #
-# --------------------+ R O T A S +-----------------------------+
-@app.route('/')   # ← Rota raiz do site
-def home():
-    return """
-    <h1>Aplicativo TEA-Adoslecente</h1>
-    <p>Servidor Flask está funcionando corretamente!</p>
+#-------------- Início de função: armazenar_resultado --------------+
+#
+def armazenar_resultado(id_cliente, saida, i, versao):
+    # Armazena o resultado (o backend faz o despejo LRU/TTL), marcado com a
+    # versão dos artefatos que o produziu
+    resultado_data = {
+        'probabilidade': float(saida['probabilidade'][i]),
+        'classificacao': saida['classificacao'][i],
+        'interpretacao': saida['interpretacao'][i],
+        'timestamp': datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+    }
+    resultados.set(id_cliente, resultado_data, version=versao)
+    return resultado_data
+#
+#-------------- Fim de função: armazenar_resultado -----------------+
+#
+#-------------- Início de função: pontuar_frames -------------------+
+#
+def linhas_para_dataframe(linhas):
+    # Linhas de respostas (dicts) -> DataFrame com a coluna de carimbo como 'ID'.
+    # Aceita o formato e.namedValues do Apps Script ({"pergunta": ["valor"]}).
+    linhas = [
+        {k: (v[0] if isinstance(v, list) and len(v) == 1 else v) for k, v in linha.items()}
+        for linha in linhas
+    ]
+    df = pd.DataFrame.from_records(linhas) if linhas else pd.DataFrame()
+    if COLUNA_CARIMBO in df.columns:
+        df = df.rename(columns={COLUNA_CARIMBO: 'ID'})
+    return df
 
-    <a href="https://sites.google.com/view/profmat-csa-ufsj/home" 
-    style="color: #337ab7; text-decoration: none;">
-    ← Voltar à Página Principal do Aplicativo
-    """
-#---------------------------------------------------------------+
+
+def respostas_faltantes(df):
+    # Linhas sem alguma das respostas (coluna ausente ou vazia), com as
+    # colunas que faltam; df já com as colunas renomeadas (Col01..Col17)
+    ausentes = df.reindex(columns=COLUNAS_RESPOSTA).isna().to_numpy()
+    return [{'linha': j, 'faltam': [c for c, a in zip(COLUNAS_RESPOSTA, linha) if a]}
+            for j, linha in enumerate(ausentes) if linha.any()]
+
+
+def pontuar_frames(frames, arts):
+    # Codifica todos os DataFrames numa única matriz e faz uma única chamada ao modelo.
+    # Retorna (saida, posicoes) de score_finite_rows: linhas com entrada não
+    # numérica (idade '?') ficam fora da pontuação com posição -1.
+    frames = [rename_form_columns(df) for df in frames if len(df)]
+    if not frames:
+        return None, np.empty(0, dtype=np.intp)
+    n = sum(len(df) for df in frames)
+    X = np.empty((n, arts.feature_encoder.n_features), dtype=np.float32)
+    inicio = 0
+    for df in frames:
+        arts.feature_encoder.encode(df, out=X[inicio:])
+        inicio += len(df)
+    return score_finite_rows(X, lambda X_validas: pontuar_com_cache(X_validas, arts.model, arts))
+
+
+def pontuar_matriz(X, modelo, arts):
+    # Modelo + mistura PPV + classificação, com tempo de cada etapa
+    with ETAPAS.time(stage='model'):
+        predicoes = modelo.predict(X, verbose=0)
+    with ETAPAS.time(stage='ppv_blend'):
+        return score_predictions(X, predicoes, arts.t_o, arts.parametros_ppv)
+
+
+def pontuar_com_cache(X, modelo, arts):
+    # Linhas codificadas já vistas saem do cache por vetor de respostas
+    if memo_cache is None:
+        return pontuar_matriz(X, modelo, arts)
+    return memo_cache.score(X, lambda X_faltantes: pontuar_matriz(X_faltantes, modelo, arts),
+                            version=arts.version)
 #
-# Para acessar resultados da avaliação TEA
-@app.route('/predict', methods=['GET'])
-def predict():
-    try:
-        # Verificação do token de acesso básico
-        token = request.args.get('token')
-        id_requerido = request.args.get('ID')  # Novo parâmetro: ID do usuário
-        
-        
-        # Verifica o token básico
-        if token != TOKEN_ACESSO:
-            return Response(
-                """
+#-------------- Fim de função: pontuar_frames ----------------------+
+#
+#-------------- Páginas pré-montadas (na inicialização) ------------+
+#
+PAGINA_ACESSO_RESTRITO = """
                 <div style="font-family: Arial; text-align: center; margin-top: 50px;">
                 
                     <h2 style="color: #d9534f;">Acesso Restrito</h2>
@@ -135,44 +354,9 @@ def predict():
                         ← Voltar à Página Principal do Aplicativo
                     </a>
                 </div>
-                """,
-                mimetype='text/html',
-                status=403
-            )
-
-        #--------------------------------------------------------------------------------+
-        # Se não tem ID, mostra mensagem para preencher o formulário
-        if not id_requerido:
-            # Primeiro obtemos o ID do cliente (timestamp da última submissão)
-            _, id_cliente = get_latest_form_data()
-            return Response(
-                f"""
-                <div style="font-family: Arial; text-align: center; margin-top: 50px;">
-                
-                    <h2 style="color: #b38600;">Aplicativo TEA-Adoslecente</h2>
-
-                    <!-- Botão para redirecionamento automático -->
-                    <a href="{APP_URL}/predict?token=TEA12345&ID={id_cliente}"
-                        style="display: inline-block; margin-top: 20px; padding: 10px 20px; 
-                            background-color: #0099cc; color: white; text-decoration: none; 
-                            border-radius: 5px; font-weight: bold;">
-                            
-                        Ver meu Resultado
-                    </a>
-            
-                </div>
-                """,
-                mimetype='text/html',
-                status=403
-                )
-        #--------------------------------------------------------------------------------+
-        # Busca os dados específicos para o ID fornecido
-        df_cliente, id_cliente = get_latest_form_data(id_requerido)
-        
-        # Verifica se encontrou o ID
-        if df_cliente is None or id_cliente is None:
-            return Response(
                 """
+
+PAGINA_NAO_ENCONTRADO = """
                 <div style="font-family: Arial; text-align: center; margin-top: 50px;">
                 
                     <h2 style="color: #d9534f;">Registro Não Encontrado</h2>
@@ -184,185 +368,61 @@ def predict():
                         ← Voltar à Página Principal do Aplicativo
                     </a>
                 </div>
-                """,
-                mimetype='text/html',
-                status=404
-            )
-        
-        # Verifica se já temos um resultado armazenado para este ID
-        if id_cliente in resultados:
-            resultado_data = resultados[id_cliente]
-        else:
-            # Renomeia colunas para: Col1, Col2, ... Col17---------------------------------+
-            if df_cliente.columns.str.startswith(('1. ', '2. ', '3. ')).any():
-                novo_nome_colunas = {
-                    col: f"Col{int(col.split('.')[0]):02d}" 
-                    for col in df_cliente.columns
-                    if col.split('.')[0].isdigit()
-                }
-                df_cliente = df_cliente.rename(columns=novo_nome_colunas)
-
-                
-            #**********************************************************************************+
-            # (Opcional) Exporta para Excel com colunas renomeadas
-            ice = 0
-            if ice == 1:
-                output_filename = f"dados_cliente_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-                output_path = os.path.join(BASE_DIR, output_filename)
-                df_cliente.to_excel(output_path, index=False, engine='openpyxl')
-                print(f"Dados exportados para: {output_path}")
-            #**********************************************************************************+
-
-            #----------------------------------------------------------------------------------------------+
-            #++++++++++++++++++++++++++++++++++++++++++++++ooooooooooooooooooooooooooooooooooooooooooooooooo
-            # Processa a P R E D I Ç Ã O
-            df_cliente_transformado = transform_new(df_cliente, scaler, encoder, feature_cols)
-            #-----------------------------------------------------------------------------------------------+
-
-
-            # ==============================================================================================
-            #        USAR PARÂMETROS DO TREINO (NÃO DO VALIDAÇÃO)
-            # ==============================================================================================
-            # Carregar parâmetros de normalização do treino
-            ppvs = parametros_ppv['ppvs']
-            te_score_min_treino = parametros_ppv['te_score_min']
-            te_score_max_treino = parametros_ppv['te_score_max']
-            alpha = parametros_ppv['alpha']
-            iia = 0
-            if iia == 1:
-                print('alpha =',alpha)
-
-            # Predição original da RNA--------------------------------------------------------------------+
-            predicao_original = float(model.predict(df_cliente_transformado.values.reshape(1, -1))[0][0]) #
-            #---------------------------------------------------------------------------------------------+
-
-            # As primeiras 10 colunas do df_cliente_transformado já são numéricas!
-            if df_cliente_transformado.shape[1] >= 10:
-                # Pegar as 10 primeiras colunas (já convertidas para 1/0)
-                valores_numericos = df_cliente_transformado.iloc[0, :10].values
-                #print(f"Valores das 10 primeiras colunas: {valores_numericos}")
-    
-                # Calcular o score
-                te_score_individual = np.dot(valores_numericos, ppvs)
-    
-            else:
-                te_score_individual = 0
-                print("Aviso: DataFrame transformado não tem 10 colunas")
-
-            # Normalizar usando os parâmetros do TREINO (correto!)
-            te_score_norm_individual = (te_score_individual - te_score_min_treino) / (te_score_max_treino - te_score_min_treino)
+                """
 
-            # Combinar com a predição do modelo
-            resultado_ajustado = (1 - alpha) * predicao_original + alpha * te_score_norm_individual
-            resultado = resultado_ajustado
-            # =============================================================================================
-            
-            
-            # Aplicar threshold padrão ou ajustado---+
-            if resultado > t_o:
-                classe_predita = 1
-                decisao = "TEA"
-            else:
-                classe_predita = 0
-                decisao = "Não TEA"
-            #-------------------------------+
+PAGINA_RESPOSTA_INVALIDA = """
+                <div style="font-family: Arial; text-align: center; margin-top: 50px;">
                 
-            # Classificação-----------------------------------------------------------+
-            Delta = 0.5*t_o
-            if t_o == 0.5:
-                if 0 <= resultado < Delta:
-                    classificacao = "Baixa"                 #classificação = nível
-                    interpretacao = "improvável"
-                elif Delta <= resultado < 2*Delta:
-                    classificacao = "Leve"
-                    interpretacao = "possível"
-                elif 2*Delta <= resultado < 3*Delta:
-                    classificacao = "Moderada"
-                    interpretacao = "provável"
-                elif 3*Delta <= resultado <= 1:
-                    classificacao = "Alta"
-                    interpretacao = "muito provável"
-        
-            elif t_o == 0.45:
-                if 0 <= resultado < Delta:
-                    classificacao = "Baixa"                 #classificação = nível
-                    interpretacao = "improvável"
-                elif Delta <= resultado < 2*Delta:
-                    classificacao = "Sinal Inicial"
-                    interpretacao = "recomenda-se observação"
-                elif 2*Delta <= resultado < 0.55:
-                    classificacao = "Leve"
-                    interpretacao = "possível"
-                elif 0.55 <= resultado < 0.775:
-                    classificacao = "Moderada"
-                    interpretacao = "provável"
-                elif 0.775 <= resultado <= 1:
-                    classificacao = "Alta"
-                    interpretacao = "muito provável"
+                    <h2 style="color: #d9534f;">Resposta Inválida</h2>
                     
-            elif t_o == 0.4:
-                if 0 <= resultado < Delta:
-                    classificacao = "Baixa"                 #classificação = nível
-                    interpretacao = "improvável"
-                elif Delta <= resultado < 2*Delta:
-                    classificacao = "Baixa a Leve"
-                    interpretacao = "possibilidade não descartada"
-                elif 2*Delta <= resultado < 3*Delta:
-                    classificacao = "Leve"
-                    interpretacao = "possível"
-                elif 3*Delta <= resultado < 4*Delta:
-                    classificacao = "Moderada"
-                    interpretacao = "provável"
-                elif 4*Delta <= resultado <= 1:
-                    classificacao = "Alta"
-                    interpretacao = "muito provável"      
-            #--------------------------------------------------------------------------+
-                
-            # Armazena o resultado (Funciona em quanto o código está sendo executado)--+
-            resultados[id_cliente] = {
-                'probabilidade': resultado,
-                'classificacao': classificacao,
-                'interpretacao': interpretacao,   # <-- adicionado
-                'timestamp': datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-            }
-            #---------------------------------------------------------------------------+
-            
-            # Limita o tamanho do dicionário de resultados
-            if len(resultados) > MAX_RESULTADOS:
-                resultados.popitem(last=False)
-            
-            resultado_data = resultados[id_cliente]
-
-            # RESUMO: RESULTADOS PARA VISUALIZAÇÃO--------------------------------------------------+
-            cdt = 0                                                                                 #
-            if cdt == 1:                                                                            #
-                print('')                                                                           #
-                print(f'id_requerido={id_requerido}')                                               #
-                print(f"Probabilidade predita: {resultado:.4f}")                                    #
-                print(f"Classe predita (threshold {t_o}): {classe_predita} ({decisao})")            #
-                print(f"Resultado: Probabilidade de TEA {resultado_data['classificacao'].lower()}") #
-            #---------------------------------------------------------------------------------------+
-            
-        # Gera o HTML
-        resultado_html = f"""
+                    <p>O formulário com o ID fornecido tem respostas que não puderam ser avaliadas
+                    (por exemplo, idade não informada).</p>
+                    <p>Por favor, preencha o formulário novamente.</p>
+                    <a href="https://sites.google.com/view/profmat-csa-ufsj/home" 
+                       style="color: #337ab7; text-decoration: none;">
+                        ← Voltar à Página Principal do Aplicativo
+                    </a>
+                </div>
+                """
+
+# Cabeçalho e rodapé da página de resultado ({...} preenchidos por requisição)
+RESULTADO_CABECALHO = """
         <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 20px auto;">
             <h2 style="color: #2c3e50;">Resultado da Avaliação</h2>
             <div style="background-color: #f8f9fa; padding: 20px; border-radius: 8px;">
                 <p><strong>ID:</strong> {id_cliente}</p>
                 <hr>
-                <p><strong>Resultado:</strong> Probabilidade de TEA <strong>{resultado_data['classificacao'].lower()}</strong></p>
+                <p><strong>Resultado:</strong> Probabilidade de TEA <strong>{classificacao}</strong></p>
                 
                 <p><strong>Interpretação do resultado:</strong></p>
                 
                 <p style="font-size: 0.9em;">Com base nas informações fornecidas, a probabilidade de 
-                Transtorno do Espectro Autista aponta para uma ocorrência <strong>{resultado_data['interpretacao'].lower()}</strong>.</p>
+                Transtorno do Espectro Autista aponta para uma ocorrência <strong>{interpretacao}</strong>.</p>
                 
 
                 <h4 style="margin-top: 20px;">Faixas de classificação:</h4>
                    
         """
-        if t_o ==0.5:  
-            resultado_html += """
+
+RESULTADO_RODAPE = """        
+                <hr>
+                
+                <p style="font-size: 0.7em;">
+                    O link a seguir é pessoal e intransferível. Guarde-o com segurança:<br><br>
+                    <a href="{app_url}/predict?token=TEA12345&ID={id_cliente}" style="color: #336699;">
+                    {app_url}/predict?token=TEA12345&ID={id_cliente}
+                    </a>
+                </p>                
+                <p style="font-size: 0.6em;">
+                    Resultado gerado em: {timestamp}
+                </p>
+            </div>
+        </div>
+        """
+
+# Tabela de faixas de classificação de cada threshold
+FAIXAS_HTML = {
+    0.5: """
                 <div style="
                 display: inline-grid;
                 grid-template-columns: 68px auto auto;
@@ -377,9 +437,8 @@ def predict():
                 <div><strong>Moderada</strong></div>  <div>&lt; 0.75 </div>  <div>Provável</div>
                 <div><strong>Alta</strong></div>      <div>&le; 1    </div>  <div>Muito provável</div>
                 </div>
-            """
-        elif t_o ==0.45:
-            resultado_html += """
+            """,
+    0.45: """
                 <div style="
                 display: inline-grid;
                 grid-template-columns: 88px auto auto;
@@ -395,9 +454,8 @@ def predict():
                 <div><strong>Moderada</strong></div>          <div>&lt; 0.775</div>  <div>Provável</div>
                 <div><strong>Alta</strong></div>              <div>&le; 1    </div>  <div>Muito provável</div>
                 </div>
-            """ 
-        elif t_o ==0.4:
-            resultado_html += """
+            """,
+    0.4: """
                 <div style="
                 display: inline-grid;
                 grid-template-columns: 88px auto auto;
@@ -413,28 +471,411 @@ def predict():
                 <div><strong>Moderada</strong></div>          <div>&lt; 0.8 </div>  <div>Provável</div>
                 <div><strong>Alta</strong></div>              <div>&le; 1   </div>  <div>Muito provável</div>
                 </div>
-            """                   
-        
-        resultado_html += f"""        
-                <hr>
+            """,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def montar_modelo_resultado(t_o, app_url):
+    # Página de resultado com a tabela de faixas do t_o já escolhida
+    if t_o not in FAIXAS_HTML:
+        raise ValueError(f"Threshold sem tabela de faixas de classificação: {t_o}")
+    modelo = RESULTADO_CABECALHO + FAIXAS_HTML[t_o] + RESULTADO_RODAPE
+    return modelo.replace("{app_url}", app_url)
+
+
+# Um t_o sem tabela de faixas impede a inicialização (e a recarga, em
+# carregar_artefatos), em vez de gerar páginas sem a tabela
+montar_modelo_resultado(artefatos_iniciais.t_o, APP_URL)
+
+
+def renderizar_resultado(id_cliente, resultado_data, t_o):
+    return montar_modelo_resultado(t_o, APP_URL).format(
+        id_cliente=html.escape(str(id_cliente)),
+        classificacao=resultado_data['classificacao'].lower(),
+        interpretacao=resultado_data['interpretacao'].lower(),
+        timestamp=resultado_data['timestamp'],
+    )
+
+
+def pagina_estatica(conteudo, status):
+    resposta = Response(conteudo, mimetype='text/html', status=status)
+    resposta.headers['Cache-Control'] = 'no-store'
+    return resposta
+
+
+def etag_resultado(id_cliente, resultado_data, versao):
+    # Muda com o ID, o escore, o momento do cálculo e a versão do modelo
+    chave = f"{id_cliente}|{resultado_data['probabilidade']!r}|{resultado_data['timestamp']}|{versao}"
+    return hashlib.sha256(chave.encode()).hexdigest()[:20]
+#
+#-------------- Fim das páginas pré-montadas -----------------------+
+#
+#-------------- Início de função: token_valido ---------------------+
+#
+def token_valido(esperado, cabecalho):
+    # Token em "Authorization: Bearer ..." ou no cabeçalho dedicado
+    token = request.headers.get(cabecalho, '')
+    autorizacao = request.headers.get('Authorization', '')
+    if autorizacao.startswith('Bearer '):
+        token = autorizacao[len('Bearer '):]
+    return secrets.compare_digest(token.encode(), esperado.encode())
+#
+#-------------- Fim de função: token_valido ------------------------+
+#
+#-------------- Etapas do /predict ---------------------------------+
+#
+# Compartilhadas pela rota Flask e pelo modo assíncrono (asgi.py)
+#
+def pagina_ultimo_id(id_cliente):
+    # Página sem ID: botão para o resultado da última submissão
+    return Response(
+        f"""
+                <div style="font-family: Arial; text-align: center; margin-top: 50px;">
                 
-                <p style="font-size: 0.7em;">
-                    O link a seguir é pessoal e intransferível. Guarde-o com segurança:<br><br>
-                    <a href="{APP_URL}/predict?token=TEA12345&ID={id_cliente}" style="color: #336699;">
-                    {APP_URL}/predict?token=TEA12345&ID={id_cliente}
+                    <h2 style="color: #b38600;">Aplicativo TEA-Adoslecente</h2>
+
+                    <!-- Botão para redirecionamento automático -->
+                    <a href="{APP_URL}/predict?token=TEA12345&ID={id_cliente}"
+                        style="display: inline-block; margin-top: 20px; padding: 10px 20px; 
+                            background-color: #0099cc; color: white; text-decoration: none; 
+                            border-radius: 5px; font-weight: bold;">
+                            
+                        Ver meu Resultado
                     </a>
-                </p>                
-                <p style="font-size: 0.6em;">
-                    Resultado gerado em: {resultado_data['timestamp']}
-                </p>
-            </div>
-        </div>
-        """
+            
+                </div>
+                """,
+        mimetype='text/html',
+        status=403,
+        headers={'Cache-Control': 'no-store'}   # o último ID muda a cada submissão
+        )
+
+
+def resposta_nao_modificada(etag):
+    resposta = Response(status=304)
+    resposta.set_etag(etag)
+    resposta.headers['Cache-Control'] = RESULT_CACHE_CONTROL
+    return resposta
+
+
+def pontuar_cliente(df_cliente, id_cliente, id_requerido, arts, modelo):
+    # Pontua a resposta de um ID (sem resultado armazenado) e armazena
+    # Renomeia colunas para: Col1, Col2, ... Col17---------------------------------+
+    df_cliente = rename_form_columns(df_cliente)
+
+
+    #**********************************************************************************+
+    # (Opcional) Exporta para Excel com colunas renomeadas
+    ice = 0
+    if ice == 1:
+        output_filename = f"dados_cliente_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+        output_path = os.path.join(BASE_DIR, output_filename)
+        df_cliente.to_excel(output_path, index=False, engine='openpyxl')
+        print(f"Dados exportados para: {output_path}")
+    #**********************************************************************************+
+
+    #----------------------------------------------------------------------------------------------+
+    #++++++++++++++++++++++++++++++++++++++++++++++ooooooooooooooooooooooooooooooooooooooooooooooooo
+    # Processa a P R E D I Ç Ã O (lote de uma linha)
+    with ETAPAS.time(stage='transform'):
+        X_cliente = arts.feature_encoder.encode(df_cliente)
+    # Idade '?': não vai ao modelo (ValueError -> página de resposta inválida, 422)
+    require_finite(X_cliente)
+    saida = pontuar_com_cache(X_cliente, modelo, arts)
+    #-----------------------------------------------------------------------------------------------+
+    resultado = float(saida['probabilidade'][0])
+    classe_predita = int(saida['classe_predita'][0])
+    decisao = "TEA" if classe_predita == 1 else "Não TEA"
+
+    resultado_data = armazenar_resultado(id_cliente, saida, 0, arts.version)
+
+    # RESUMO: RESULTADOS PARA VISUALIZAÇÃO--------------------------------------------------+
+    cdt = 0                                                                                 #
+    if cdt == 1:                                                                            #
+        print('')                                                                           #
+        print(f'id_requerido={id_requerido}')                                               #
+        print(f"Probabilidade predita: {resultado:.4f}")                                    #
+        print(f"Classe predita (threshold {arts.t_o}): {classe_predita} ({decisao})")       #
+        print(f"Resultado: Probabilidade de TEA {resultado_data['classificacao'].lower()}") #
+    #---------------------------------------------------------------------------------------+
 
-        return Response(resultado_html, mimetype='text/html')
+    return resultado_data
 
+
+def resposta_resultado(id_cliente, resultado_data, arts):
+    inicio_html = time.perf_counter()
+    resultado_html = renderizar_resultado(id_cliente, resultado_data, arts.t_o)
+    ETAPAS.observe(time.perf_counter() - inicio_html, stage='html')
+    resposta = Response(resultado_html, mimetype='text/html')
+    resposta.set_etag(etag_resultado(id_cliente, resultado_data, arts.version))
+    resposta.headers['Cache-Control'] = RESULT_CACHE_CONTROL
+    return resposta
+#
+#-------------- Fim das etapas do /predict -------------------------+
+#
+# --------------------+ R O T A S +-----------------------------+
+@app.route('/')   # ← Rota raiz do site
+def home():
+    return """
+    <h1>Aplicativo TEA-Adoslecente</h1>
+    <p>Servidor Flask está funcionando corretamente!</p>
+
+    <a href="https://sites.google.com/view/profmat-csa-ufsj/home" 
+    style="color: #337ab7; text-decoration: none;">
+    ← Voltar à Página Principal do Aplicativo
+    """
+#---------------------------------------------------------------+
+#
+# Para acessar resultados da avaliação TEA
+@app.route('/predict', methods=['GET'])
+def predict():
+    try:
+        # Verificação do token de acesso básico
+        token = request.args.get('token')
+        id_requerido = request.args.get('ID')  # Novo parâmetro: ID do usuário
+        
+        
+        # Verifica o token básico
+        if token != TOKEN_ACESSO:
+            return pagina_estatica(PAGINA_ACESSO_RESTRITO, 403)
+
+        # Uma única versão dos artefatos durante toda a requisição
+        arts = registry.current
+
+        #--------------------------------------------------------------------------------+
+        # Se não tem ID, mostra mensagem para preencher o formulário
+        if not id_requerido:
+            # Primeiro obtemos o ID do cliente (timestamp da última submissão)
+            with ETAPAS.time(stage='form_fetch'):
+                _, id_cliente = get_latest_form_data()
+            return pagina_ultimo_id(id_cliente)
+        #--------------------------------------------------------------------------------+
+        # Resultado já armazenado (pontuado na ingestão ou numa visita anterior):
+        # consulta pura, sem planilha nem modelo
+        resultado_data = resultados.get(id_requerido)
+        if resultado_data is not None:
+            CACHE_RESULTADOS.inc(result='hit')
+            # Requisição condicional com a mesma versão da página: 304 sem montar nada
+            etag = etag_resultado(id_requerido, resultado_data, arts.version)
+            if request.if_none_match.contains_weak(etag):
+                return resposta_nao_modificada(etag)
+            df_cliente, id_cliente = None, id_requerido
+        else:
+            CACHE_RESULTADOS.inc(result='miss')
+            # Busca os dados específicos para o ID fornecido
+            with ETAPAS.time(stage='form_fetch'):
+                df_cliente, id_cliente = get_latest_form_data(id_requerido)
+        
+        # Verifica se encontrou o ID
+        if id_cliente is None:
+            return pagina_estatica(PAGINA_NAO_ENCONTRADO, 404)
+        
+        # Sem resultado armazenado: pontua agora (caminho de compatibilidade)
+        if resultado_data is None:
+            resultado_data = pontuar_cliente(df_cliente, id_cliente, id_requerido, arts, modelo_de(arts))
+
+        # Gera o HTML (página pré-montada para o t_o carregado)
+        return resposta_resultado(id_cliente, resultado_data, arts)
+
+    except ValueError as e:
+        # Resposta que não pode ser pontuada (idade '?', valor fora das opções)
+        registrar_erro('predict', e)
+        return pagina_estatica(PAGINA_RESPOSTA_INVALIDA, 422)
+    except Exception as e:
+        registrar_erro('predict', e)
+        return jsonify({'error': str(e)}), 500
+
+#---------------------------------------------------------------+
+#
+# Pontuação em lote: {"ids": [...]} e/ou {"rows": [{...}, ...]}
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    try:
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            return jsonify({'error': 'Corpo JSON inválido'}), 400
+
+        token = request.args.get('token') or payload.get('token')
+        if token != TOKEN_ACESSO:
+            return jsonify({'error': 'Acesso restrito'}), 403
+
+        ids = payload.get('ids') or []
+        linhas = payload.get('rows') or []
+        if not isinstance(ids, list) or not isinstance(linhas, list):
+            return jsonify({'error': "'ids' e 'rows' devem ser listas"}), 400
+        ids = [str(i) for i in ids]
+
+        arts = registry.current
+        # IDs já pontuados saem direto do cache; o restante é buscado de uma vez
+        respostas_ids = {}
+        for i in ids:
+            resultado_data = resultados.get(i)
+            CACHE_RESULTADOS.inc(result='miss' if resultado_data is None else 'hit')
+            if resultado_data is not None:
+                respostas_ids[i] = resultado_data
+        pendentes = list(dict.fromkeys(i for i in ids if i not in respostas_ids))
+        df_ids = form_store.get_many(pendentes)
+        nao_encontrados = [i for i in pendentes if i not in df_ids.index]
+
+        df_linhas = linhas_para_dataframe(linhas)
+        # Linhas avulsas precisam de todas as respostas (colunas ausentes virariam 0)
+        incompletas = respostas_faltantes(rename_form_columns(df_linhas))
+        if incompletas:
+            return jsonify({'error': 'Respostas incompletas', 'incompletas': incompletas}), 400
+
+        # Linhas da planilha sem alguma resposta: erro só para esses IDs
+        erros = []
+        incompletos = respostas_faltantes(rename_form_columns(df_ids))
+        if incompletos:
+            completos = np.ones(len(df_ids), dtype=bool)
+            for item in incompletos:
+                completos[item['linha']] = False
+                erros.append({'ID': df_ids.index[item['linha']],
+                              'error': f"Respostas incompletas, faltam: {item['faltam']}"})
+            df_ids = df_ids[completos]
+
+        # Uma única matriz, uma única chamada ao modelo
+        saida, posicoes = pontuar_frames([df_ids.reset_index(drop=True), df_linhas], arts)
+
+        for i, id_cliente in enumerate(df_ids.index):
+            if posicoes[i] < 0:
+                erros.append({'ID': id_cliente, 'error': NON_FINITE_ERROR})
+            else:
+                respostas_ids[id_cliente] = armazenar_resultado(id_cliente, saida, posicoes[i], arts.version)
+
+        saida_linhas = []
+        for j in range(len(df_linhas)):
+            i = posicoes[len(df_ids) + j]
+            if i < 0:
+                item = {'linha': j, 'error': NON_FINITE_ERROR}
+            else:
+                item = {
+                    'linha': j,
+                    'probabilidade': float(saida['probabilidade'][i]),
+                    'classificacao': saida['classificacao'][i],
+                    'interpretacao': saida['interpretacao'][i],
+                }
+            if 'ID' in df_linhas.columns and pd.notna(df_linhas['ID'].iloc[j]):
+                item['ID'] = str(df_linhas['ID'].iloc[j])
+            saida_linhas.append(item)
+
+        return jsonify({
+            'resultados': [dict(respostas_ids[i], ID=i) for i in ids if i in respostas_ids],
+            'linhas': saida_linhas,
+            'nao_encontrados': nao_encontrados,
+            'erros': erros,
+        })
+
+    except ValueError as e:
+        registrar_erro('predict_batch', e)
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
+        registrar_erro('predict_batch', e)
         return jsonify({'error': str(e)}), 500
 
+#---------------------------------------------------------------+
+#
+# Ingestão: o gatilho de envio do formulário envia a resposta, que é pontuada
+# na hora e armazenada pelo ID (carimbo de data/hora). O /predict passa a ser
+# uma consulta pura. Com vários workers, use RESULT_STORE=sqlite.
+# Corpo: uma linha (objeto JSON), uma lista de linhas, {"rows": [...]} ou CSV.
+@app.route('/ingest', methods=['POST'])
+def ingest():
+    try:
+        if not INGEST_TOKEN:
+            return jsonify({'error': 'Ingestão desabilitada (INGEST_TOKEN não configurado)'}), 404
+
+        if not token_valido(INGEST_TOKEN, 'X-Ingest-Token'):
+            return jsonify({'error': 'Acesso restrito'}), 403
+
+        if request.mimetype == 'text/csv':
+            df = pd.read_csv(io.StringIO(request.get_data(as_text=True)), dtype=str)
+            df = df.rename(columns={COLUNA_CARIMBO: 'ID'})
+        else:
+            payload = request.get_json(silent=True)
+            if isinstance(payload, dict):
+                payload = payload.get('rows', [payload])
+            if not isinstance(payload, list) or not all(isinstance(l, dict) for l in payload):
+                return jsonify({'error': 'Corpo JSON inválido'}), 400
+            df = linhas_para_dataframe(payload)
+
+        if df.empty:
+            return jsonify({'error': 'Nenhuma resposta recebida'}), 400
+        if 'ID' not in df.columns or df['ID'].isna().any():
+            return jsonify({'error': f"Toda resposta precisa de '{COLUNA_CARIMBO}' ou 'ID'"}), 400
+
+        df = rename_form_columns(df)
+        incompletas = respostas_faltantes(df)
+        if incompletas:
+            return jsonify({'error': 'Respostas incompletas', 'incompletas': incompletas}), 400
+
+        ids = df['ID'].astype(str).str.strip().tolist()
+        arts = registry.current
+        saida, posicoes = pontuar_frames([df], arts)
+        armazenados = [dict(armazenar_resultado(id_cliente, saida, i, arts.version), ID=id_cliente)
+                       for i, id_cliente in zip(posicoes, ids) if i >= 0]
+        erros = [{'ID': id_cliente, 'error': NON_FINITE_ERROR}
+                 for i, id_cliente in zip(posicoes, ids) if i < 0]
+
+        # Nada armazenado: a requisição inteira é inválida
+        return jsonify({'armazenados': armazenados, 'erros': erros}), 201 if armazenados else 400
+
+    except ValueError as e:
+        registrar_erro('ingest', e)
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        registrar_erro('ingest', e)
+        return jsonify({'error': str(e)}), 500
+
+#---------------------------------------------------------------+
+#
+# Recarga dos artefatos sem reiniciar (neste worker; com vários workers, use
+# ARTIFACT_WATCH_SECONDS para que cada um recarregue ao ver os arquivos novos).
+# Por padrão carrega em segundo plano e responde 202; com ?wait=1 espera e
+# responde com a versão em uso. ?force=1 recarrega mesmo sem mudança.
+@app.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    try:
+        if not ADMIN_TOKEN:
+            return jsonify({'error': 'Administração desabilitada (ADMIN_TOKEN não configurado)'}), 404
+        if not token_valido(ADMIN_TOKEN, 'X-Admin-Token'):
+            return jsonify({'error': 'Acesso restrito'}), 403
+
+        force = request.args.get('force') == '1'
+        if request.args.get('wait') == '1':
+            nova = registry.reload(force)
+            return jsonify(dict(registry.status(), trocou=nova is not None))
+        iniciada = registry.reload_async(force)
+        return jsonify(dict(registry.status(), iniciada=iniciada)), 202
+
+    except Exception as e:
+        registrar_erro('admin_reload', e)
+        return jsonify({'error': str(e), 'versao': registry.version}), 500
+
+#---------------------------------------------------------------+
+#
+# Métricas do processo no formato de texto do Prometheus
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(metricas.render(), mimetype='text/plain; version=0.0.4')
+
+#---------------------------------------------------------------+
+#
+# Prontidão: o módulo só termina de carregar depois do aquecimento, então
+# responder aqui significa modelo carregado e aquecido
+@app.route('/ready', methods=['GET'])
+def ready():
+    return jsonify({
+        'status': 'ok',
+        'versao_modelo': registry.version,
+        'pacote': registry.current.scaler is None,   # carregado do pacote pré-compilado
+        'artefatos': registry.status(),
+        'aquecido': STARTUP_WARMUP,
+        'inicializacao': relatorio_inicializacao.as_dict(),
+        'pid': os.getpid(),
+        'memoria': memory_usage(),
+    })
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+#------------------- REGISTRO VERSIONADO DE ARTEFATOS ----------------------+
+#
+# Guarda a versão atual dos artefatos (Artefatos) e a substitui sem
+# reiniciar os workers: a nova versão é carregada, validada e aquecida fora
+# do caminho das requisições e só então trocada, numa única atribuição. Cada
+# requisição lê ``registry.current`` uma vez e usa esse objeto até o fim,
+# então requisições em andamento terminam com a versão em que começaram.
+#
+# A recarga é disparada por um observador do diretório dos artefatos
+# (poll_interval > 0) ou chamando reload() / reload_async() (rota de admin).
+#
+import os
+import threading
+import time
+import traceback
+
+from artifacts import ARTIFACT_FILES, calcular_versao_artefatos
+from process_thread import ProcessThread
+
+
+class ArtifactRegistry:
+    """Versão atual dos artefatos, trocada atomicamente por recargas."""
+
+    def __init__(self, artefatos, loader, base_dir, poll_interval=0.0, on_swap=None, max_history=10):
+        # loader() -> Artefatos (carga completa a partir de base_dir)
+        # on_swap(antigo, novo): chamado logo após cada troca
+        self._atual = artefatos
+        self.loader = loader
+        self.base_dir = base_dir
+        self.poll_interval = poll_interval
+        self.on_swap = on_swap
+        self.max_history = max_history
+        self.history = [(artefatos.version, time.time())]
+        self.reloads = 0
+        self.failures = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._recarregando = None   # thread de reload_async em andamento
+        self._assinatura = self._assinatura_arquivos()
+        self._parar = threading.Event()
+        self._observador = ProcessThread(self._loop, "artifact-watch", prepare=self._parar.clear)
+
+    @property
+    def current(self):
+        if self.poll_interval and not self._observador.running:
+            self.start()
+        return self._atual
+
+    @property
+    def version(self):
+        return self._atual.version
+
+    def _caminhos(self):
+        return [os.path.join(self.base_dir, nome) for nome in ARTIFACT_FILES]
+
+    def _assinatura_arquivos(self):
+        assinatura = []
+        for caminho in self._caminhos():
+            try:
+                st = os.stat(caminho)
+                assinatura.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                assinatura.append(None)
+        return tuple(assinatura)
+
+    #---------------- Recarga ------------------------------------------+
+    def reload(self, force=False):
+        """Carrega, valida e aquece a versão do disco e a coloca em uso.
+
+        Retorna a nova versão, ou None se os arquivos não mudaram (a menos de
+        ``force``). Em caso de erro a versão atual continua em uso e a
+        exceção é propagada.
+        """
+        with self._lock:
+            self._assinatura = self._assinatura_arquivos()
+            try:
+                if not force and calcular_versao_artefatos(self._caminhos()) == self._atual.version:
+                    return None
+                novo = self.loader()
+                novo.validate()
+                novo.warmup()
+            except Exception as e:
+                self.failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                raise
+            antigo, self._atual = self._atual, novo
+            self.reloads += 1
+            self.last_error = None
+            self.history = (self.history + [(novo.version, time.time())])[-self.max_history:]
+            if self.on_swap is not None:
+                self.on_swap(antigo, novo)
+            return novo.version
+
+    def reload_async(self, force=False):
+        """Dispara reload() numa thread; False se já houver uma em andamento."""
+        with self._lock:
+            if self._recarregando is not None and self._recarregando.is_alive():
+                return False
+            self._recarregando = threading.Thread(target=self._recarregar, args=(force,),
+                                                  name="artifact-reload", daemon=True)
+            self._recarregando.start()
+            return True
+
+    def _recarregar(self, force=False):
+        try:
+            versao = self.reload(force)
+            if versao:
+                print(f"Artefatos recarregados: versão {versao}")
+        except Exception:
+            print("Aviso: falha ao recarregar os artefatos; mantendo a versão "
+                  f"{self._atual.version}.\n{traceback.format_exc()}")
+
+    #---------------- Observador do diretório --------------------------+
+    def _loop(self):
+        anterior = self._assinatura
+        while not self._parar.wait(self.poll_interval):
+            assinatura = self._assinatura_arquivos()
+            # Só recarrega quando os arquivos mudaram e pararam de mudar
+            # (uma cópia em andamento não dispara a carga pela metade)
+            if assinatura != self._assinatura and assinatura == anterior and None not in assinatura:
+                self._recarregar()
+            anterior = assinatura
+
+    def start(self):
+        if self.poll_interval:
+            self._observador.start()
+
+    def stop(self):
+        self._parar.set()
+        self._observador.stop()
+
+    def status(self):
+        return {
+            'versao': self._atual.version,
+            'recargas': self.reloads,
+            'falhas': self.failures,
+            'ultimo_erro': self.last_error,
+            'recarregando': self._recarregando is not None and self._recarregando.is_alive(),
+            'historico': [{'versao': v, 'carregada_em': t} for v, t in self.history],
+        }
+#
+#------------------- FIM DO REGISTRO DE ARTEFATOS --------------------------+
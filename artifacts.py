@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+#------------------- ARTEFATOS DO MODELO ----------------------+
+#
+# Carga dos artefatos de treino (scaler, encoder, feature_cols, modelo,
+# threshold e parâmetros PPV), compartilhada pelo app Flask e pela
+# pontuação em lote pela linha de comando (bulk_score.py).
+#
+# Para partidas rápidas, os artefatos podem ser empacotados num único
+# arquivo .npz (pesos da rede em NumPy + tabelas do codificador compilado +
+# threshold e PPV), que carrega sem importar TensorFlow nem scikit-learn:
+#
+#   python artifacts.py build-bundle tea_bundle.npz
+#
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from feature_encoder import CompiledFeatureEncoder
+from numpy_model import NumpyDenseModel, load_inference_model
+from pipeline import classification_bands, finite_rows, score_frame, score_matrix
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+SCALER_FILE = 'scaler.pkl'
+ENCODER_FILE = 'encoder.pkl'
+FEATURE_COLS_FILE = 'feature_cols.csv'
+MODEL_FILE = 'meu_modelo_TEA.keras'
+THRESHOLD_FILE = 'threshold.pkl'
+PARAMETROS_FILE = 'parametros_ppv.pkl'
+ARTIFACT_FILES = (SCALER_FILE, ENCODER_FILE, FEATURE_COLS_FILE,
+                  MODEL_FILE, THRESHOLD_FILE, PARAMETROS_FILE)
+BUNDLE_FORMAT = 1
+
+
+def calcular_versao_artefatos(caminhos):
+    # Versão dos artefatos: hash do conteúdo dos arquivos do modelo
+    h = hashlib.sha256()
+    for caminho in caminhos:
+        with open(caminho, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()[:12]
+
+
+class StartupReport:
+    """Tempo gasto em cada etapa da inicialização."""
+
+    def __init__(self):
+        self.etapas = []
+
+    @contextmanager
+    def etapa(self, nome):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.etapas.append((nome, time.perf_counter() - inicio))
+
+    @property
+    def total(self):
+        return sum(segundos for _, segundos in self.etapas)
+
+    def as_dict(self):
+        return {'etapas_ms': {nome: round(s * 1000, 2) for nome, s in self.etapas},
+                'total_ms': round(self.total * 1000, 2)}
+
+    def __str__(self):
+        partes = ', '.join(f"{nome} {s * 1000:.0f} ms" for nome, s in self.etapas)
+        return f"Inicialização: {self.total * 1000:.0f} ms ({partes})"
+
+
+class Artefatos:
+    """Conjunto de artefatos carregados de um diretório ou de um pacote."""
+
+    def __init__(self, scaler, encoder, feature_cols, model, t_o, parametros_ppv, version,
+                 feature_encoder=None):
+        self.scaler = scaler
+        self.encoder = encoder
+        self.feature_cols = feature_cols
+        self.model = model
+        self.t_o = t_o
+        self.parametros_ppv = parametros_ppv
+        self.version = version
+        # Codificador compilado (tabelas de índice construídas uma única vez)
+        self.feature_encoder = feature_encoder or CompiledFeatureEncoder.from_artifacts(
+            scaler, encoder, feature_cols)
+
+    def score_matrix(self, X, model=None):
+        return score_matrix(X, model or self.model, self.t_o, self.parametros_ppv)
+
+    def score_frame(self, df):
+        return score_frame(df, self.feature_encoder, self.model, self.t_o, self.parametros_ppv)
+
+    def validate(self):
+        """Confere a consistência entre colunas, codificador, modelo e PPV.
+
+        Levanta ValueError descrevendo a primeira inconsistência encontrada.
+        """
+        n = len(self.feature_cols)
+        if self.feature_encoder.n_features != n:
+            raise ValueError(f"Codificador gera {self.feature_encoder.n_features} colunas, "
+                             f"feature_cols tem {n}")
+        entrada = getattr(self.model, 'input_dim', None)
+        if entrada is None:
+            entrada = self.model.input_shape[-1]   # modelo Keras
+        if entrada != n:
+            raise ValueError(f"Modelo espera {entrada} entradas, feature_cols tem {n}")
+        classification_bands(self.t_o)
+        faltantes = {'te_score_min', 'te_score_max', 'ppvs', 'alpha'} - set(self.parametros_ppv)
+        if faltantes:
+            raise ValueError(f"parametros_ppv incompleto, faltam: {sorted(faltantes)}")
+        # Idade '?' vira NaN e essas linhas não vão ao modelo (finite_rows):
+        # só as linhas com entrada finita precisam de saída finita
+        X = self.feature_encoder.encode(self.feature_encoder.sample_answers(32))
+        X = X[finite_rows(X)]
+        if not np.all(np.isfinite(self.score_matrix(X)['probabilidade'])):
+            raise ValueError("Modelo produziu probabilidades não finitas")
+
+    def warmup(self, n=8):
+        # Predições sintéticas: a primeira chamada ao Keras paga o tracing do
+        # grafo; com elas o primeiro usuário não paga esse custo
+        respostas = self.feature_encoder.sample_answers(n)
+        respostas = respostas[finite_rows(self.feature_encoder.encode(respostas))]
+        self.score_frame(respostas.iloc[[0]])
+        self.score_frame(respostas)
+
+
+def load_artifacts(base_dir=BASE_DIR, backend='keras', verify=False, report=None):
+    import joblib   # importa o scikit-learn ao desserializar: só quando necessário
+
+    report = report or StartupReport()
+    caminho = lambda nome: os.path.join(base_dir, nome)
+
+    with report.etapa('scaler'):
+        scaler = joblib.load(caminho(SCALER_FILE))
+    with report.etapa('encoder'):
+        encoder = joblib.load(caminho(ENCODER_FILE))
+    with report.etapa('feature_cols'):
+        feature_cols = pd.read_csv(caminho(FEATURE_COLS_FILE), header=None).iloc[:, 0].tolist()
+    with report.etapa('codificador'):
+        feature_encoder = CompiledFeatureEncoder.from_artifacts(scaler, encoder, feature_cols)
+        if verify:
+            feature_encoder.check_equivalence(scaler, encoder)
+    with report.etapa(f'modelo_{backend}'):
+        model = load_inference_model(caminho(MODEL_FILE), backend, verify=verify,
+                                     feature_encoder=feature_encoder)
+    with report.etapa('threshold_ppv'):
+        t_o = joblib.load(caminho(THRESHOLD_FILE))
+        parametros_ppv = joblib.load(caminho(PARAMETROS_FILE))
+    with report.etapa('versao'):
+        version = calcular_versao_artefatos([caminho(nome) for nome in ARTIFACT_FILES])
+
+    return Artefatos(scaler, encoder, feature_cols, model, t_o, parametros_ppv, version,
+                     feature_encoder=feature_encoder)
+
+
+#---------------- Pacote pré-compilado ---------------------------+
+def build_bundle(caminho, base_dir=BASE_DIR):
+    """Empacota os artefatos de ``base_dir`` num único .npz.
+
+    Levanta ValueError (sem gravar nada) se os artefatos forem inconsistentes.
+    """
+    artefatos = load_artifacts(base_dir, backend='numpy')
+    artefatos.validate()   # mesma checagem da recarga (dimensões, faixas do t_o, PPV)
+    pesos, ativacoes = artefatos.model.to_arrays()
+    ppv = artefatos.parametros_ppv
+    meta = {
+        'format': BUNDLE_FORMAT,
+        'version': artefatos.version,
+        't_o': float(artefatos.t_o),
+        'parametros_ppv': {k: float(v) for k, v in ppv.items() if k != 'ppvs'},
+        'activations': ativacoes,
+        'encoder': artefatos.feature_encoder.to_dict(),
+    }
+    with open(caminho, 'wb') as f:
+        np.savez(f, meta=np.array(json.dumps(meta, ensure_ascii=False)),
+                 ppvs=np.asarray(ppv['ppvs'], dtype=np.float64), **pesos)
+    return artefatos.version
+
+
+def load_bundle(caminho, report=None):
+    """Carrega um pacote .npz (sem TensorFlow nem scikit-learn)."""
+    report = report or StartupReport()
+    with report.etapa('pacote'):
+        with np.load(caminho, allow_pickle=False) as dados:
+            meta = json.loads(str(dados['meta']))
+            arrays = {k: dados[k] for k in dados.files if k != 'meta'}
+    if meta.get('format') != BUNDLE_FORMAT:
+        raise ValueError(f"Formato de pacote não suportado: {meta.get('format')}")
+
+    with report.etapa('modelo_numpy'):
+        model = NumpyDenseModel.from_arrays(arrays, meta['activations'])
+    with report.etapa('codificador'):
+        feature_encoder = CompiledFeatureEncoder.from_dict(meta['encoder'])
+    parametros_ppv = dict(meta['parametros_ppv'], ppvs=arrays['ppvs'])
+    return Artefatos(None, None, feature_encoder.feature_cols, model, meta['t_o'],
+                     parametros_ppv, meta['version'], feature_encoder=feature_encoder)
+
+
+def load_serving_artifacts(base_dir=BASE_DIR, backend='keras', verify=False,
+                           bundle=None, warmup=True):
+    """Carga para o servidor: pacote (se houver e estiver atualizado) + aquecimento.
+
+    Retorna (artefatos, relatório de inicialização).
+    """
+    report = StartupReport()
+    artefatos = None
+    if bundle and os.path.exists(bundle):
+        artefatos = load_bundle(bundle, report)
+        fontes = [os.path.join(base_dir, nome) for nome in ARTIFACT_FILES]
+        if all(os.path.exists(f) for f in fontes):
+            with report.etapa('versao'):
+                versao_atual = calcular_versao_artefatos(fontes)
+            if versao_atual != artefatos.version:
+                print(f"Aviso: pacote {bundle} desatualizado ({artefatos.version} != {versao_atual}); "
+                      "carregando os artefatos originais.")
+                artefatos = None
+    elif bundle:
+        print(f"Aviso: pacote {bundle} não encontrado; carregando os artefatos originais.")
+
+    if artefatos is None:
+        artefatos = load_artifacts(base_dir, backend=backend, verify=verify, report=report)
+    if warmup:
+        with report.etapa('aquecimento'):
+            artefatos.warmup()
+    return artefatos, report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ferramentas dos artefatos do modelo TEA.")
+    sub = parser.add_subparsers(dest='comando', required=True)
+    p = sub.add_parser('build-bundle', help="empacota os artefatos num .npz de carga rápida")
+    p.add_argument('saida', nargs='?', default=os.path.join(BASE_DIR, 'tea_bundle.npz'))
+    p.add_argument('--artifacts', default=BASE_DIR, help="diretório dos artefatos originais")
+    p = sub.add_parser('startup-report', help="mostra onde vai o tempo de carga")
+    p.add_argument('--bundle', help="pacote .npz (opcional)")
+    p.add_argument('--backend', default='keras', choices=['keras', 'numpy'])
+    args = parser.parse_args(argv)
+
+    if args.comando == 'build-bundle':
+        versao = build_bundle(args.saida, args.artifacts)
+        print(f"Pacote {args.saida} gerado (versão {versao})")
+    else:
+        _, report = load_serving_artifacts(backend=args.backend, bundle=args.bundle)
+        json.dump(report.as_dict(), sys.stdout, indent=2, ensure_ascii=False)
+        print()
+
+
+if __name__ == '__main__':
+    main()
+#
+#------------------- FIM DOS ARTEFATOS DO MODELO ---------------+
@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+#------------------- MODO ASSÍNCRONO (ASGI) ----------------------+
+#
+#   uvicorn asgi:app --host 0.0.0.0 --port 5000 [--workers 2]
+#
+# O /predict roda no event loop: a planilha é baixada por um cliente HTTP
+# assíncrono compartilhado (httpx, conexões keep-alive e timeouts), e
+# atualizações simultâneas da planilha esperam um único download em vez de
+# abrir uma conexão cada. A codificação e o modelo rodam num pool de threads
+# limitado, fora do event loop; com INFERENCE_MAX_PENDING pontuações já
+# admitidas, o /predict responde 503 em vez de enfileirar. As demais rotas (/predict/batch, /ingest,
+# /admin/reload, /metrics, /ready, /) são as do app Flask, executadas numa
+# thread por requisição.
+#
+# Dependências opcionais deste modo: httpx (cliente) e um servidor ASGI
+# (uvicorn). O modo Flask/gunicorn não precisa delas.
+#
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from flask import Response
+
+import app as servidor
+from app import (CACHE_RESULTADOS, ETAPAS, PAGINA_ACESSO_RESTRITO, PAGINA_NAO_ENCONTRADO,
+                 PAGINA_RESPOSTA_INVALIDA,
+                 TOKEN_ACESSO, etag_resultado, metricas, modelo_de, pagina_estatica,
+                 pagina_ultimo_id, pontuar_cliente, registrar_erro, registry, resposta_nao_modificada,
+                 resposta_resultado, resultados)
+
+# Pool HTTP da planilha-------------------------------------------------+
+FORM_HTTP_TIMEOUT = float(os.environ.get('FORM_HTTP_TIMEOUT', 30))
+FORM_HTTP_CONNECT_TIMEOUT = float(os.environ.get('FORM_HTTP_CONNECT_TIMEOUT', 5))
+FORM_HTTP_MAX_CONNECTIONS = int(os.environ.get('FORM_HTTP_MAX_CONNECTIONS', 10))
+FORM_HTTP_KEEPALIVE_SECONDS = float(os.environ.get('FORM_HTTP_KEEPALIVE_SECONDS', 60))
+# Threads para codificação + modelo, e máximo de pontuações admitidas
+# (rodando ou na fila do pool); acima disso, 503 com Retry-After
+INFERENCE_THREADS = int(os.environ.get('INFERENCE_THREADS', min(4, os.cpu_count() or 1)))
+INFERENCE_MAX_PENDING = int(os.environ.get('INFERENCE_MAX_PENDING', 64))
+INFERENCE_RETRY_AFTER = os.environ.get('INFERENCE_RETRY_AFTER', '1')   # segundos
+# Threads para as rotas Flask (WSGI)
+WSGI_THREADS = int(os.environ.get('WSGI_THREADS', 8))
+#-----------------------------------------------------------------------+
+
+PAGINA_SERVICO_OCUPADO = """
+                <div style="font-family: Arial; text-align: center; margin-top: 50px;">
+                
+                    <h2 style="color: #d9534f;">Serviço Ocupado</h2>
+                    
+                    <p>Muitas avaliações estão sendo processadas neste momento.</p>
+                    <p>Por favor, tente novamente em alguns segundos.</p>
+                    <a href="https://sites.google.com/view/profmat-csa-ufsj/home" 
+                       style="color: #337ab7; text-decoration: none;">
+                        ← Voltar à Página Principal do Aplicativo
+                    </a>
+                </div>
+                """
+
+
+def pagina_ocupado():
+    resposta = pagina_estatica(PAGINA_SERVICO_OCUPADO, 503)
+    resposta.headers['Retry-After'] = INFERENCE_RETRY_AFTER
+    return resposta
+
+
+class AsyncFormStore:
+    """Consultas ao FormDataStore com downloads assíncronos e agrupados.
+
+    Usa o índice em memória do ``store`` (o mesmo das rotas Flask); só o
+    download muda: um AsyncClient do httpx compartilhado, e no máximo um
+    download (+ leitura + junção) em andamento por vez, que todas as
+    requisições concorrentes aguardam.
+    """
+
+    def __init__(self, store, executor, timeout=30.0, connect_timeout=5.0,
+                 max_connections=10, keepalive_expiry=60.0):
+        self.store = store
+        self.executor = executor
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_connections = max_connections
+        self.keepalive_expiry = keepalive_expiry
+        # A atualização periódica passa a ser uma tarefa do event loop
+        self.refresh_interval, store.refresh_interval = store.refresh_interval, 0
+        self.client = None
+        self._em_andamento = None
+        self._tarefa = None
+        self.downloads = 0
+        self.coalesced = 0
+
+    #---------------- Ciclo de vida (lifespan) ------------------------+
+    async def start(self):
+        import httpx   # dependência opcional: só no modo assíncrono
+
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_connections,
+                                keepalive_expiry=self.keepalive_expiry),
+            follow_redirects=True)
+        if self.refresh_interval:
+            self._tarefa = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+        if self.client is not None:
+            await self.client.aclose()
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh(max_age=self.refresh_interval / 2)
+            except Exception as e:
+                print(f"Aviso: falha ao atualizar a planilha do formulário: {e}")
+
+    #---------------- Download e junção -------------------------------+
+    async def _fetch(self):
+        fonte = self.store.source
+        if fonte.startswith(('http://', 'https://')):
+            resposta = await self.client.get(fonte)
+            resposta.raise_for_status()
+            return resposta.content
+        return await asyncio.to_thread(self.store.fetch)
+
+    async def _atualizar(self):
+        inicio = time.perf_counter()
+        dados = await self._fetch()
+        self.downloads += 1
+        # Leitura do CSV e junção ao índice: CPU, fora do event loop
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, self.store.incorporate, dados, inicio)
+
+    async def refresh(self, max_age=None):
+        """Mesma semântica de FormDataStore.refresh, com downloads agrupados."""
+        if max_age is not None and self.store.age() < max_age:
+            return 0
+        if self._em_andamento is None:
+            self._em_andamento = asyncio.ensure_future(self._atualizar())
+            self._em_andamento.add_done_callback(self._concluido)
+        else:
+            self.coalesced += 1
+        # shield: o cancelamento de uma requisição não cancela o download das outras
+        return await asyncio.shield(self._em_andamento)
+
+    def _concluido(self, tarefa):
+        self._em_andamento = None
+        if not tarefa.cancelled():
+            tarefa.exception()   # evita o aviso de exceção não recuperada
+
+    #---------------- Consultas ---------------------------------------+
+    async def get(self, id_requerido):
+        if self.store.mode == 'scan':
+            # Sem índice em memória: leitura em blocos (bloqueante) numa thread
+            return await asyncio.to_thread(self.store.get, id_requerido)
+        df = self.store.lookup(id_requerido)
+        if df is None:
+            await self.refresh(max_age=self.store.min_refresh_interval)
+            df = self.store.lookup(id_requerido)
+        return df
+
+    async def latest_id(self):
+        if self.store.mode == 'scan':
+            return await asyncio.to_thread(self.store.latest_id)
+        await self.refresh(max_age=self.store.min_refresh_interval)
+        return self.store.lookup_latest()
+
+
+class AsyncPredictApp:
+    """Aplicação ASGI: /predict assíncrono; o restante vai para o app Flask."""
+
+    def __init__(self, wsgi_app, store):
+        self.wsgi_app = wsgi_app
+        self.inferencia = ThreadPoolExecutor(INFERENCE_THREADS, thread_name_prefix="inferencia")
+        self.wsgi = ThreadPoolExecutor(WSGI_THREADS, thread_name_prefix="wsgi")
+        self.formulario = AsyncFormStore(
+            store, self.inferencia, timeout=FORM_HTTP_TIMEOUT,
+            connect_timeout=FORM_HTTP_CONNECT_TIMEOUT,
+            max_connections=FORM_HTTP_MAX_CONNECTIONS,
+            keepalive_expiry=FORM_HTTP_KEEPALIVE_SECONDS)
+        self._vagas = None   # semáforo criado no event loop (lifespan)
+        self.recusadas = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] != 'http':
+            return
+        if scope['path'] == '/predict' and scope['method'] == 'GET':
+            return await self._predict(scope, send)
+        return await self._wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            mensagem = await receive()
+            if mensagem['type'] == 'lifespan.startup':
+                self._vagas = asyncio.Semaphore(INFERENCE_MAX_PENDING)
+                await self.formulario.start()
+                await send({'type': 'lifespan.startup.complete'})
+            elif mensagem['type'] == 'lifespan.shutdown':
+                await self.formulario.stop()
+                self.inferencia.shutdown(wait=False)
+                self.wsgi.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _pontuar(self, *args):
+        # No máximo INFERENCE_MAX_PENDING pontuações admitidas; com todas as
+        # vagas em uso retorna None (503) em vez de esperar no semáforo
+        if self._vagas is None:
+            self._vagas = asyncio.Semaphore(INFERENCE_MAX_PENDING)
+        if self._vagas.locked():
+            self.recusadas += 1
+            return None
+        async with self._vagas:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.inferencia, pontuar_cliente, *args)
+
+    #---------------- /predict ----------------------------------------+
+    async def _predict(self, scope, send):
+        # Mesmo fluxo da rota Flask predict(), com as esperas no event loop
+        args = {k: v[0] for k, v in parse_qs(scope['query_string'].decode('latin-1')).items()}
+        cabecalhos = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope['headers']}
+        try:
+            token = args.get('token')
+            id_requerido = args.get('ID')
+            if token != TOKEN_ACESSO:
+                return await self._enviar(send, pagina_estatica(PAGINA_ACESSO_RESTRITO, 403))
+
+            arts = registry.current
+            if not id_requerido:
+                with ETAPAS.time(stage='form_fetch'):
+                    id_cliente = await self.formulario.latest_id()
+                return await self._enviar(send, pagina_ultimo_id(id_cliente))
+
+            resultado_data = resultados.get(id_requerido)
+            if resultado_data is not None:
+                CACHE_RESULTADOS.inc(result='hit')
+                etag = etag_resultado(id_requerido, resultado_data, arts.version)
+                if _etag_confere(cabecalhos.get('if-none-match', ''), etag):
+                    return await self._enviar(send, resposta_nao_modificada(etag))
+                df_cliente, id_cliente = None, id_requerido
+            else:
+                CACHE_RESULTADOS.inc(result='miss')
+                with ETAPAS.time(stage='form_fetch'):
+                    df_cliente = await self.formulario.get(id_requerido)
+                id_cliente = None if df_cliente is None else id_requerido
+
+            if id_cliente is None:
+                return await self._enviar(send, pagina_estatica(PAGINA_NAO_ENCONTRADO, 404))
+
+            if resultado_data is None:
+                resultado_data = await self._pontuar(df_cliente, id_cliente, id_requerido,
+                                                     arts, modelo_de(arts))
+                if resultado_data is None:
+                    return await self._enviar(send, pagina_ocupado())
+            return await self._enviar(send, resposta_resultado(id_cliente, resultado_data, arts))
+
+        except ValueError as e:
+            registrar_erro('predict', e)
+            return await self._enviar(send, pagina_estatica(PAGINA_RESPOSTA_INVALIDA, 422))
+        except Exception as e:
+            registrar_erro('predict', e)
+            return await self._enviar(send, Response(json.dumps({'error': str(e)}), status=500,
+                                                     mimetype='application/json'))
+
+    @staticmethod
+    async def _enviar(send, resposta):
+        corpo = resposta.get_data()
+        cabecalhos = [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in resposta.headers.items()]
+        await send({'type': 'http.response.start', 'status': resposta.status_code, 'headers': cabecalhos})
+        await send({'type': 'http.response.body', 'body': corpo})
+
+    #---------------- Demais rotas (Flask) ----------------------------+
+    async def _wsgi(self, scope, receive, send):
+        corpo = bytearray()
+        while True:
+            mensagem = await receive()
+            corpo += mensagem.get('body', b'')
+            if not mensagem.get('more_body'):
+                break
+        environ = _environ(scope, bytes(corpo))
+        status, cabecalhos, partes = await asyncio.get_running_loop().run_in_executor(
+            self.wsgi, _executar_wsgi, self.wsgi_app, environ)
+        await send({'type': 'http.response.start', 'status': status, 'headers': cabecalhos})
+        await send({'type': 'http.response.body', 'body': b''.join(partes)})
+
+
+def _etag_confere(if_none_match, etag):
+    # If-None-Match: lista de ETags (comparação fraca) ou "*"
+    if if_none_match.strip() == '*':
+        return True
+    return any(item.strip().removeprefix('W/').strip('"') == etag
+               for item in if_none_match.split(','))
+
+
+def _environ(scope, corpo):
+    servidor_host, servidor_porta = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': servidor_host,
+        'SERVER_PORT': str(servidor_porta),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(corpo),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+        'CONTENT_LENGTH': str(len(corpo)),
+    }
+    for nome, valor in scope['headers']:
+        nome, valor = nome.decode('latin-1').upper().replace('-', '_'), valor.decode('latin-1')
+        if nome == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = valor
+        elif nome != 'CONTENT_LENGTH':
+            chave = f'HTTP_{nome}'
+            environ[chave] = f"{environ[chave]},{valor}" if chave in environ else valor
+    return environ
+
+
+def _executar_wsgi(wsgi_app, environ):
+    resposta = {}
+
+    def start_response(status, cabecalhos, exc_info=None):
+        resposta['status'] = int(status.split(' ', 1)[0])
+        resposta['cabecalhos'] = [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in cabecalhos]
+
+    iterador = wsgi_app(environ, start_response)
+    try:
+        partes = list(iterador)
+    finally:
+        if hasattr(iterador, 'close'):
+            iterador.close()
+    return resposta['status'], resposta['cabecalhos'], partes
+
+
+app = AsyncPredictApp(servidor.app, servidor.form_store)
+
+metricas.gauge('tea_form_downloads_total', 'Downloads da planilha (modo assíncrono).',
+               lambda: app.formulario.downloads, type='counter')
+metricas.gauge('tea_form_downloads_coalesced_total',
+               'Atualizações que aguardaram um download já em andamento (modo assíncrono).',
+               lambda: app.formulario.coalesced, type='counter')
+metricas.gauge('tea_inference_rejected_total',
+               'Requisições do /predict recusadas com 503 por falta de vaga de pontuação (modo assíncrono).',
+               lambda: app.recusadas, type='counter')
+#
+#------------------- FIM DO MODO ASSÍNCRONO ----------------------+
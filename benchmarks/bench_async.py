@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+#------------------- BENCHMARK DO MODO ASSÍNCRONO ----------------------+
+#
+# Sobe o servidor substituto da planilha (form_server.py, com atraso por
+# resposta) e dispara requisições /predict concorrentes contra:
+#   - wsgi: o app Flask num servidor com uma thread por requisição;
+#   - asgi: asgi.py no uvicorn (downloads agrupados, pool keep-alive).
+# Com FORM_MIN_REFRESH_SECONDS=0 toda requisição pede uma planilha nova,
+# o pior caso para a fonte lenta. Mostra latências, downloads feitos na
+# planilha e conexões abertas para ela.
+#
+# Uso (na raiz do repositório; requer httpx e uvicorn):
+#   python benchmarks/bench_async.py [--concurrency 50] [--delay 0.5]
+#          [--rows 1000] [--backend numpy] [--output bench_async.json]
+#
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from benchmarks.form_server import FormServer  # noqa: E402
+from benchmarks.synthetic_form import escrever_planilha  # noqa: E402
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def subir_servidor(modo, porta):
+    if modo == 'asgi':
+        import uvicorn
+        import asgi
+
+        servidor = uvicorn.Server(uvicorn.Config(asgi.app, host='127.0.0.1', port=porta,
+                                                 log_level='warning', lifespan='on'))
+        threading.Thread(target=servidor.run, daemon=True).start()
+        while not servidor.started:
+            time.sleep(0.05)
+    else:
+        from werkzeug.serving import make_server
+        import app
+
+        servidor = make_server('127.0.0.1', porta, app.app, threaded=True)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+
+
+async def disparar(url, consultas):
+    import httpx
+
+    async def uma(cliente, query):
+        inicio = time.perf_counter()
+        resposta = await cliente.get(url, params=query)
+        return time.perf_counter() - inicio, resposta.status_code
+
+    limites = httpx.Limits(max_connections=len(consultas))
+    async with httpx.AsyncClient(timeout=120, limits=limites) as cliente:
+        inicio = time.perf_counter()
+        resultados = await asyncio.gather(*(uma(cliente, q) for q in consultas))
+        return time.perf_counter() - inicio, resultados
+
+
+def rodar_modo(modo, args):
+    # Processo filho: o servidor da planilha já está no ambiente (FORM_SOURCE_URL)
+    porta = porta_livre()
+    subir_servidor(modo, porta)
+    import app
+
+    app.form_store.refresh()
+    ids = app.form_store.ids()[-args.concurrency:]
+    app.resultados.clear()
+    consultas = [{'token': app.TOKEN_ACESSO, 'ID': i} if k % 2 else {'token': app.TOKEN_ACESSO}
+                 for k, i in enumerate(ids)]
+    total, resultados = asyncio.run(disparar(f"http://127.0.0.1:{porta}/predict", consultas))
+    latencias = np.array([r[0] for r in resultados]) * 1000
+    return {
+        'wall_seconds': total,
+        'status': sorted({r[1] for r in resultados}),
+        'p50_ms': float(np.percentile(latencias, 50)),
+        'p99_ms': float(np.percentile(latencias, 99)),
+        'max_ms': float(latencias.max()),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="/predict concorrente: Flask x ASGI com planilha lenta.")
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--delay', type=float, default=0.5, help="atraso (s) da planilha substituta")
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--backend', default='numpy', choices=['keras', 'numpy'])
+    parser.add_argument('--output', default='', help="arquivo JSON de resultados (opcional)")
+    parser.add_argument('--modo', choices=['wsgi', 'asgi'], help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.modo:
+        json.dump(rodar_modo(args.modo, args), sys.stdout)
+        return
+
+    relatorio = {'concurrency': args.concurrency, 'delay': args.delay, 'rows': args.rows, 'modos': {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        planilha = escrever_planilha(os.path.join(tmp, 'planilha.csv'), args.rows)
+        for modo in ('wsgi', 'asgi'):
+            fonte = FormServer(planilha, args.delay).start()
+            ambiente = dict(os.environ, INFERENCE_BACKEND=args.backend, FORM_SOURCE_URL=fonte.url,
+                            FORM_REFRESH_SECONDS='0', FORM_MIN_REFRESH_SECONDS='0',
+                            RESULT_STORE='memory')
+            saida = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--modo', modo,
+                 '--concurrency', str(args.concurrency)],
+                cwd=RAIZ, env=ambiente, capture_output=True, text=True, check=True).stdout
+            r = json.loads(saida.strip().splitlines()[-1])
+            # A primeira carga da planilha (antes das requisições) também conta
+            r['form_downloads'], r['form_connections'] = fonte.requests, fonte.connections
+            fonte.shutdown()
+            relatorio['modos'][modo] = r
+            print(f"{modo}: {args.concurrency} requisições em {r['wall_seconds']:.2f} s | "
+                  f"p50 {r['p50_ms']:.0f} ms, p99 {r['p99_ms']:.0f} ms | "
+                  f"downloads da planilha {r['form_downloads']}, conexões {r['form_connections']} | "
+                  f"status {r['status']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
+#
+#------------------- FIM DO BENCHMARK DO MODO ASSÍNCRONO ---------------+
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+#------------------- MEMÓRIA POR WORKER ----------------------+
+#
+# Reproduz o modelo pré-fork do gunicorn (sem depender dele) e mede a
+# memória de cada worker depois de atender algumas requisições:
+#   - per_worker: cada worker importa o app depois do fork (sem preload);
+#   - preload:    o app é importado no mestre, o heap é congelado
+#                 (worker_memory.freeze_heap) e só então os workers são criados.
+# A soma dos PSS é a memória realmente ocupada pelos workers. Só Linux.
+#
+# Uso (na raiz do repositório):
+#   python benchmarks/bench_memory.py [--workers 4] [--backend numpy]
+#          [--bundle tea_bundle.npz] [--output bench_memory.json]
+#
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from benchmarks.synthetic_form import escrever_planilha  # noqa: E402
+from worker_memory import format_report, freeze_heap, memory_usage  # noqa: E402
+
+
+def atender(app_module, n=20):
+    cliente = app_module.app.test_client()
+    for _ in range(n):
+        cliente.get('/predict', query_string={'token': app_module.TOKEN_ACESSO})
+
+
+def worker(app_module, saida):
+    # No worker: importa (se ainda não veio do mestre), atende e avisa o mestre
+    if app_module is None:
+        import app as app_module
+    atender(app_module)
+    os.write(saida, b'.')
+    time.sleep(3600)
+
+
+def rodar_modo(modo, n_workers):
+    app_module = None
+    if modo == 'preload':
+        import app as app_module
+        atender(app_module, 1)
+        freeze_heap()
+
+    pids, (entrada, saida) = [], os.pipe()
+    for _ in range(n_workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                worker(app_module, saida)
+            finally:
+                os._exit(0)
+        pids.append(pid)
+    for _ in pids:
+        os.read(entrada, 1)
+
+    processos = [(f'mestre {os.getpid()}', memory_usage())]
+    processos += [(f'worker {p}', memory_usage(p)) for p in pids]
+    for pid in pids:
+        os.kill(pid, 9)
+        os.waitpid(pid, 0)
+    return processos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memória por worker: preload x carga por worker.")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--backend', default='numpy', choices=['keras', 'numpy'])
+    parser.add_argument('--bundle', default='', help="pacote .npz (ARTIFACT_BUNDLE)")
+    parser.add_argument('--output', default='', help="arquivo JSON de resultados (opcional)")
+    parser.add_argument('--modo', choices=['per_worker', 'preload'], help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.modo:
+        # Processo filho: um modo por interpretador, para não herdar imports
+        json.dump(rodar_modo(args.modo, args.workers), sys.stdout)
+        return
+
+    relatorio = {'workers': args.workers, 'backend': args.backend, 'bundle': args.bundle, 'modos': {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        ambiente = dict(os.environ, INFERENCE_BACKEND=args.backend, ARTIFACT_BUNDLE=args.bundle,
+                        FORM_SOURCE_URL=escrever_planilha(os.path.join(tmp, 'planilha.csv'), 1000),
+                        FORM_REFRESH_SECONDS='0', RESULT_STORE='memory')
+        for modo in ('per_worker', 'preload'):
+            saida = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--modo', modo,
+                 '--workers', str(args.workers)],
+                cwd=RAIZ, env=ambiente, capture_output=True, text=True, check=True).stdout
+            processos = json.loads(saida.strip().splitlines()[-1])
+            relatorio['modos'][modo] = processos
+            print(f"\n{modo}:\n" + format_report(processos[1:]))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
+#
+#------------------- FIM DA MEMÓRIA POR WORKER ---------------+
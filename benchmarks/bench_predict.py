@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+#------------------- BENCHMARK DO /predict ----------------------+
+#
+# Mede o pipeline do /predict pelo test client do Flask, com a planilha do
+# formulário substituída por um CSV sintético local (synthetic_form.py).
+# Para cada tamanho de planilha, mede vazão e latências p50/p95/p99 de:
+#   - cold:      ID ainda sem resultado (planilha em memória, modelo roda;
+#                cache por vetor de respostas desligado, como antes dele);
+#   - cache_hit: ID com resultado já armazenado;
+#   - memo_hit:  ID sem resultado armazenado, mas com o vetor de respostas
+#                no cache por vetor (só com MEMO_CACHE_SIZE > 0);
+#   - no_id:     /predict sem ID (busca o último ID da planilha).
+# Os resultados vão para um JSON comparável entre commits.
+#
+# Uso (na raiz do repositório):
+#   python benchmarks/bench_predict.py [--sizes 100 1000 10000 100000]
+#          [--requests 200] [--backend numpy] [--output bench_results.json]
+#
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from benchmarks.synthetic_form import escrever_planilha  # noqa: E402
+
+
+def percentis(latencias):
+    a = np.asarray(latencias) * 1000
+    return {
+        'n': int(a.size),
+        'throughput_rps': float(a.size / (a.sum() / 1000)) if a.size else 0.0,
+        'mean_ms': float(a.mean()),
+        'p50_ms': float(np.percentile(a, 50)),
+        'p95_ms': float(np.percentile(a, 95)),
+        'p99_ms': float(np.percentile(a, 99)),
+    }
+
+
+def medir(cliente, consultas):
+    latencias = []
+    for query in consultas:
+        inicio = time.perf_counter()
+        resposta = cliente.get('/predict', query_string=query)
+        latencias.append(time.perf_counter() - inicio)
+        # 403: página sem ID; 422: resposta inválida na planilha (idade '?')
+        if resposta.status_code not in (200, 403, 422):
+            raise RuntimeError(f"/predict respondeu {resposta.status_code}: {resposta.get_data(as_text=True)[:200]}")
+    return latencias
+
+
+def rodar_tamanho(app_module, caminho, n_requisicoes, token):
+    from form_store import FormDataStore
+
+    # Planilha nova para este tamanho (sem atualização em segundo plano)
+    store = FormDataStore(caminho, refresh_interval=0, min_refresh_interval=3600,
+                          on_fetch=app_module.form_store.on_fetch)
+    inicio = time.perf_counter()
+    store.refresh()
+    carga = time.perf_counter() - inicio
+    app_module.form_store = store
+    cliente = app_module.app.test_client()
+
+    ids = store.ids()[-n_requisicoes:]
+    resultados = {}
+
+    consultas = [{'token': token, 'ID': i} for i in ids]
+    memo = app_module.memo_cache
+
+    # cold: o cache de resultados é limpo e o cache por vetor fica desligado
+    # (vetores repetidos não pulam o modelo): cada ID roda o modelo
+    app_module.memo_cache = None
+    app_module.resultados.clear()
+    try:
+        resultados['cold'] = percentis(medir(cliente, consultas))
+    finally:
+        app_module.memo_cache = memo
+
+    # cache_hit: os mesmos IDs, agora já armazenados
+    resultados['cache_hit'] = percentis(medir(cliente, consultas))
+
+    # memo_hit: resultados limpos, vetores de respostas já no cache por vetor
+    if memo is not None:
+        memo.clear()
+        app_module.resultados.clear()
+        medir(cliente, consultas)   # aquece o cache por vetor
+        app_module.resultados.clear()
+        resultados['memo_hit'] = percentis(medir(cliente, consultas))
+
+    # no_id: página que aponta para o último ID
+    resultados['no_id'] = percentis(medir(cliente, [{'token': token}] * n_requisicoes))
+
+    resultados['sheet_load_seconds'] = carga
+    return resultados
+
+
+def commit_atual():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark reprodutível do pipeline /predict.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000, 100000],
+                        help="tamanhos da planilha sintética (linhas)")
+    parser.add_argument('--requests', type=int, default=200, help="requisições por caso")
+    parser.add_argument('--backend', default=os.environ.get('INFERENCE_BACKEND', 'keras'),
+                        choices=['keras', 'numpy'])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='bench_results.json', help="arquivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # O app lê a configuração na importação: ajusta o ambiente antes
+        os.environ['INFERENCE_BACKEND'] = args.backend
+        os.environ['FORM_SOURCE_URL'] = escrever_planilha(os.path.join(tmp, 'inicial.csv'), 10, args.seed)
+        os.environ['FORM_REFRESH_SECONDS'] = '0'
+        os.environ.setdefault('RESULT_STORE', 'memory')
+        os.environ['MAX_RESULTADOS'] = str(max(5000, args.requests))
+
+        inicio = time.perf_counter()
+        import app as app_module
+        import_seconds = time.perf_counter() - inicio
+
+        relatorio = {
+            'commit': commit_atual(),
+            'date': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'backend': args.backend,
+            'result_store': os.environ['RESULT_STORE'],
+            'microbatch': app_module.MICROBATCH,
+            'memo_cache_size': app_module.MEMO_CACHE_SIZE,
+            'requests_per_case': args.requests,
+            'seed': args.seed,
+            'import_seconds': import_seconds,
+            'sizes': {},
+        }
+
+        for n in args.sizes:
+            caminho = escrever_planilha(os.path.join(tmp, f'planilha_{n}.csv'), n, args.seed)
+            r = rodar_tamanho(app_module, caminho, min(args.requests, n), app_module.TOKEN_ACESSO)
+            relatorio['sizes'][str(n)] = r
+            print(f"{n:>7} linhas | carga {r['sheet_load_seconds'] * 1000:8.1f} ms | " + " | ".join(
+                f"{caso} p50 {r[caso]['p50_ms']:.2f} p99 {r[caso]['p99_ms']:.2f} ms "
+                f"({r[caso]['throughput_rps']:.0f} req/s)" for caso in ('cold', 'cache_hit', 'memo_hit', 'no_id') if caso in r))
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, indent=2, ensure_ascii=False)
+    print(f"Resultados gravados em {args.output}")
+
+
+if __name__ == '__main__':
+    main()
+#
+#------------------- FIM DO BENCHMARK DO /predict ---------------+
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+#------------------- BENCHMARK DA LEITURA DA PLANILHA ----------------------+
+#
+# Tempo de leitura e pico de memória (tracemalloc) da planilha de respostas
+# por tamanho, comparando:
+#   - padrao:   pd.read_csv com os tipos padrão e todas as colunas;
+#   - enxuto:   read_form_csv (só carimbo + perguntas 1..17, 'category');
+#   - scan_meio / scan_fim: FormDataStore em modo 'scan' buscando um ID no
+#               meio / no fim da planilha (leitura em blocos até encontrá-lo).
+# A planilha sintética inclui colunas de texto livre (--extras) que o modelo
+# não usa, como numa exportação real.
+#
+# Uso (na raiz do repositório):
+#   python benchmarks/bench_sheet_parse.py [--sizes 1000 10000 100000]
+#          [--extras 2] [--chunksize 5000] [--output bench_sheet.json]
+#
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from benchmarks.synthetic_form import escrever_planilha  # noqa: E402
+from form_store import FormDataStore, read_form_csv  # noqa: E402
+
+
+def medir(fn, repeticoes=3):
+    # Melhor tempo de ``repeticoes`` execuções; pico de memória da primeira
+    tracemalloc.start()
+    resultado = fn()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        fn()
+        tempos.append(time.perf_counter() - inicio)
+    memoria = resultado.memory_usage(deep=True).sum() if isinstance(resultado, pd.DataFrame) else 0
+    return {'seconds': min(tempos), 'peak_mb': pico / 2**20, 'frame_mb': memoria / 2**20}
+
+
+def rodar_tamanho(caminho, chunksize):
+    with open(caminho, 'rb') as f:
+        dados = f.read()
+    ids = pd.read_csv(io.BytesIO(dados), usecols=[0], dtype=str).iloc[:, 0]
+    store = FormDataStore(caminho, refresh_interval=0, mode='scan', chunksize=chunksize)
+    return {
+        'bytes': len(dados),
+        'padrao': medir(lambda: pd.read_csv(io.BytesIO(dados))),
+        'enxuto': medir(lambda: read_form_csv(io.BytesIO(dados))),
+        'scan_meio': medir(lambda: store.get(ids.iloc[len(ids) // 2])),
+        'scan_fim': medir(lambda: store.get(ids.iloc[-1])),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Leitura da planilha: tempo e pico de memória.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--extras', type=int, default=2, help="colunas de texto livre na planilha")
+    parser.add_argument('--chunksize', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='', help="arquivo JSON de resultados (opcional)")
+    args = parser.parse_args(argv)
+
+    relatorio = {'extras': args.extras, 'chunksize': args.chunksize, 'sizes': {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            caminho = escrever_planilha(os.path.join(tmp, f'planilha_{n}.csv'), n, args.seed, args.extras)
+            r = relatorio['sizes'][str(n)] = rodar_tamanho(caminho, args.chunksize)
+            print(f"{n:>7} linhas ({r['bytes'] / 2**20:.1f} MB) | " + " | ".join(
+                f"{caso} {r[caso]['seconds'] * 1000:.1f} ms, pico {r[caso]['peak_mb']:.1f} MB"
+                + (f", frame {r[caso]['frame_mb']:.1f} MB" if r[caso]['frame_mb'] else "")
+                for caso in ('padrao', 'enxuto', 'scan_meio', 'scan_fim')))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
+#
+#------------------- FIM DO BENCHMARK DA LEITURA DA PLANILHA ---------------+
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+#------------------- SERVIDOR SUBSTITUTO DA PLANILHA ----------------------+
+#
+# Servidor HTTP local que serve um CSV no lugar da exportação do Google
+# Sheets, com atraso configurável por resposta (para simular a planilha
+# lenta) e contadores de requisições e de conexões abertas (para conferir
+# keep-alive e o agrupamento de downloads do modo assíncrono).
+#
+# Uso:
+#   python benchmarks/form_server.py planilha.csv [--port 8765] [--delay 0.5]
+#   FORM_SOURCE_URL=http://127.0.0.1:8765/planilha.csv uvicorn asgi:app
+#
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FormServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, caminho, delay=0.0, host='127.0.0.1', port=0):
+        self.caminho = caminho
+        self.delay = delay
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        super().__init__((host, port), _Handler)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/planilha.csv"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="form-server", daemon=True).start()
+        return self
+
+    def _contar(self, campo):
+        with self._lock:
+            setattr(self, campo, getattr(self, campo) + 1)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # keep-alive
+
+    def setup(self):
+        super().setup()
+        self.server._contar('connections')
+
+    def do_GET(self):
+        self.server._contar('requests')
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        with open(self.server.caminho, 'rb') as f:
+            dados = f.read()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/csv; charset=utf-8')
+        self.send_header('Content-Length', str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def log_message(self, *args):
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve um CSV como a planilha do formulário.")
+    parser.add_argument('caminho', help="arquivo CSV")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', type=float, default=0.0, help="atraso (s) de cada resposta")
+    args = parser.parse_args(argv)
+    servidor = FormServer(args.caminho, args.delay, args.host, args.port)
+    print(f"Servindo {args.caminho} em {servidor.url}")
+    servidor.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
+#
+#------------------- FIM DO SERVIDOR SUBSTITUTO ---------------------------+
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+#------------------- PLANILHA SINTÉTICA DO FORMULÁRIO ----------------------+
+#
+# Gera um CSV no mesmo formato da exportação do Google Sheets (coluna
+# "Carimbo de data/hora" + perguntas "1. ..." a "17. ..."), com respostas
+# de distribuição realista para Col01..Col17. Usado pelos benchmarks como
+# fonte local do formulário (FORM_SOURCE_URL). Com --extras, acrescenta
+# colunas de texto livre que o modelo não usa (como as de uma planilha real).
+#
+# Uso:
+#   python benchmarks/synthetic_form.py 10000 planilha.csv [--seed 0] [--extras 0]
+#
+import argparse
+import csv
+from datetime import datetime, timedelta
+
+import numpy as np
+
+CABECALHO = ["Carimbo de data/hora"] + [f"{i}. Pergunta {i}" for i in range(1, 18)]
+
+# Probabilidade de "Sim" em cada pergunta Sim/Não (Col01..Col10, Col14, Col16)
+P_SIM = {1: 0.45, 2: 0.35, 3: 0.40, 4: 0.42, 5: 0.38, 6: 0.30,
+         7: 0.33, 8: 0.36, 9: 0.41, 10: 0.37, 14: 0.12, 16: 0.10}
+IDADES = ([12, 13, 14, 15, 16], [0.22, 0.21, 0.20, 0.19, 0.18])
+SEXO = (["Masculino", "Feminino"], [0.55, 0.45])
+ETNIA = (["Branco", "Negro", "Latino", "Hispânico", "Asiático", "Indígena",
+          "Oriente Médio", "Sul Asiáticos", "Outros", "?"],
+         [0.32, 0.14, 0.16, 0.05, 0.06, 0.03, 0.04, 0.04, 0.06, 0.10])
+PAIS = (["Brasil", "Portugal", "Estados Unidos", "Reino Unido", "Índia", "Canadá",
+         "Angola", "Argentina", "França", "Outro país"],
+        [0.70, 0.06, 0.06, 0.03, 0.03, 0.02, 0.03, 0.03, 0.02, 0.02])
+RESPONDENTE = (["Pai ou Mãe", "Eu mesmo", "Parente", "Profissional de saúde", "Outros", "?"],
+               [0.55, 0.25, 0.08, 0.05, 0.04, 0.03])
+P_IDADE_DESCONHECIDA = 0.01
+PALAVRAS = ("criança", "escola", "comportamento", "rotina", "família", "atenção",
+            "fala", "amigos", "sono", "observação", "professora", "consulta")
+
+
+def cabecalho(extras=0):
+    return CABECALHO + [f"Observações {k}" for k in range(1, extras + 1)]
+
+
+def gerar_respostas(n, seed=0, inicio=datetime(2025, 1, 1), extras=0):
+    """Linhas (carimbo + 17 respostas + ``extras`` textos) com carimbos crescentes e únicos."""
+    rng = np.random.default_rng(seed)
+    escolher = lambda opcoes: rng.choice(opcoes[0], size=n, p=opcoes[1])
+    segundos = np.cumsum(rng.integers(1, 600, size=n))
+
+    colunas = {}
+    for q, p in P_SIM.items():
+        colunas[q] = np.where(rng.random(n) < p, "Sim", "Não")
+    idade = escolher(IDADES).astype(object)
+    idade[rng.random(n) < P_IDADE_DESCONHECIDA] = "?"
+    colunas[11] = idade
+    colunas[12] = escolher(SEXO)
+    colunas[13] = escolher(ETNIA)
+    colunas[15] = escolher(PAIS)
+    colunas[17] = escolher(RESPONDENTE)
+
+    textos = [[" ".join(rng.choice(PALAVRAS, size=rng.integers(3, 25))) for _ in range(n)]
+              for _ in range(extras)]
+
+    for i in range(n):
+        carimbo = (inicio + timedelta(seconds=int(segundos[i]))).strftime("%d/%m/%Y %H:%M:%S")
+        yield [carimbo] + [colunas[q][i] for q in range(1, 18)] + [t[i] for t in textos]
+
+
+def escrever_planilha(caminho, n, seed=0, extras=0):
+    with open(caminho, 'w', newline='', encoding='utf-8') as f:
+        escritor = csv.writer(f)
+        escritor.writerow(cabecalho(extras))
+        escritor.writerows(gerar_respostas(n, seed, extras=extras))
+    return caminho
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera uma planilha sintética de respostas.")
+    parser.add_argument('n', type=int, help="número de respostas")
+    parser.add_argument('saida', help="arquivo CSV de saída")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--extras', type=int, default=0, help="colunas de texto livre adicionais")
+    args = parser.parse_args(argv)
+    escrever_planilha(args.saida, args.n, args.seed, args.extras)
+
+
+if __name__ == '__main__':
+    main()
+#
+#------------------- FIM DA PLANILHA SINTÉTICA ------------------------------+
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+#------------------- PONTUAÇÃO EM LOTE (LINHA DE COMANDO) ----------------------+
+#
+# Pontua uma exportação CSV da planilha de respostas (auditorias, exportações
+# para pesquisa) com os mesmos artefatos do app.py, sem passar pelo /predict.
+# O CSV é lido em blocos de tamanho fixo e cada bloco é pontuado como um lote
+# e acrescentado ao arquivo de saída: a memória não cresce com a planilha.
+# O último carimbo processado fica num arquivo de estado, de modo que uma nova
+# execução pontua apenas as respostas novas.
+#
+# Uso:
+#   python bulk_score.py respostas.csv resultados.csv [--chunksize 5000]
+#                        [--state resultados.csv.state.json] [--backend numpy] [--full]
+#
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from artifacts import BASE_DIR, load_artifacts
+from form_store import COLUNA_CARIMBO, parse_timestamps, read_form_csv
+from pipeline import NON_FINITE_ERROR, rename_form_columns, score_finite_rows
+
+COLUNAS_SAIDA = ['ID', 'probabilidade', 'predicao_original', 'classe_predita',
+                 'classificacao', 'interpretacao', 'versao_modelo']
+
+
+def carregar_estado(caminho):
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def salvar_estado(caminho, estado):
+    # Grava num temporário e renomeia: o estado nunca fica pela metade
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(estado, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, caminho)
+
+
+def codificar_bloco(df, codificador):
+    # Codifica o bloco de uma vez; se o codificador rejeitar alguma resposta
+    # (Sim/Não ou sexo inválido), codifica linha a linha só para isolá-las.
+    # Retorna (X, {linha: erro}); linhas rejeitadas ficam com NaN em X.
+    respostas = rename_form_columns(df)
+    try:
+        return codificador.encode(respostas), {}
+    except ValueError:
+        X = np.empty((len(df), codificador.n_features), dtype=np.float32)
+        erros = {}
+        for i in range(len(df)):
+            try:
+                codificador.encode(respostas.iloc[[i]], out=X[i:])
+            except ValueError as e:
+                X[i] = np.nan
+                erros[i] = str(e)
+        return X, erros
+
+
+def pontuar_bloco(df, artefatos):
+    # Uma codificação e uma chamada ao modelo por bloco; linhas não finitas
+    # (idade '?', respostas rejeitadas) ficam de fora e contam como
+    # inválidas. Retorna (resultados, inválidas).
+    X, erros = codificar_bloco(df, artefatos.feature_encoder)
+    resultado, posicoes = score_finite_rows(X, artefatos.score_matrix)
+    validas = posicoes >= 0
+    for i in np.flatnonzero(~validas):
+        print(f"Aviso: resposta {df['ID'].iloc[i]} ignorada: {erros.get(i, NON_FINITE_ERROR)}",
+              file=sys.stderr)
+    if resultado is None:
+        return [], int((~validas).sum())
+    return [(df[validas], resultado)], int((~validas).sum())
+
+
+def bulk_score(entrada, saida, artefatos, chunksize=5000, estado_path=None, completo=False):
+    estado_path = estado_path or saida + '.state.json'
+    estado = {} if completo else carregar_estado(estado_path)
+    if estado.get('versao_modelo') not in (None, artefatos.version):
+        print(f"Aviso: estado gerado com a versão {estado['versao_modelo']} dos artefatos; "
+              f"a atual é {artefatos.version}. Use --full para repontuar tudo.", file=sys.stderr)
+    ultimo_ts = pd.Timestamp(estado['ultimo_carimbo']) if estado.get('ultimo_carimbo') else None
+    if completo and os.path.exists(saida):
+        os.remove(saida)
+
+    totais = {'lidas': 0, 'pontuadas': 0, 'invalidas': 0}
+    for bloco in read_form_csv(entrada, chunksize=chunksize):
+        totais['lidas'] += len(bloco)
+        bloco = bloco.rename(columns={COLUNA_CARIMBO: 'ID'}).dropna(subset=['ID'])
+        ts = parse_timestamps(bloco['ID'])
+        novas = ts.notna() if ultimo_ts is None else (ts > ultimo_ts)
+        totais['invalidas'] += int(ts.isna().sum())
+        bloco, ts = bloco[novas].reset_index(drop=True), ts[novas]
+        if bloco.empty:
+            continue
+
+        partes, invalidas = pontuar_bloco(bloco, artefatos)
+        totais['invalidas'] += invalidas
+        for df, resultado in partes:
+            pd.DataFrame({
+                'ID': df['ID'].to_numpy(),
+                'probabilidade': resultado['probabilidade'],
+                'predicao_original': resultado['predicao_original'],
+                'classe_predita': resultado['classe_predita'],
+                'classificacao': resultado['classificacao'],
+                'interpretacao': resultado['interpretacao'],
+                'versao_modelo': artefatos.version,
+            }, columns=COLUNAS_SAIDA).to_csv(
+                saida, mode='a', index=False, header=not os.path.exists(saida))
+            totais['pontuadas'] += len(df)
+
+        # O estado só avança depois que o bloco foi gravado na saída
+        if ultimo_ts is None or ts.max() > ultimo_ts:
+            ultimo_ts = ts.max()
+        salvar_estado(estado_path, {'ultimo_carimbo': ultimo_ts.isoformat(),
+                                    'versao_modelo': artefatos.version})
+    return totais
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pontua em lote uma exportação CSV do formulário TEA.")
+    parser.add_argument('entrada', help="CSV exportado da planilha de respostas")
+    parser.add_argument('saida', help="CSV de resultados (as novas linhas são acrescentadas)")
+    parser.add_argument('--chunksize', type=int, default=5000, help="linhas por bloco (padrão: 5000)")
+    parser.add_argument('--state', help="arquivo de estado (padrão: <saida>.state.json)")
+    parser.add_argument('--backend', default=os.environ.get('INFERENCE_BACKEND', 'keras'),
+                        choices=['keras', 'numpy'], help="backend de inferência")
+    parser.add_argument('--artifacts', default=BASE_DIR, help="diretório dos artefatos do modelo")
+    parser.add_argument('--full', action='store_true', help="ignora o estado e repontua tudo")
+    args = parser.parse_args(argv)
+
+    artefatos = load_artifacts(args.artifacts, backend=args.backend)
+    totais = bulk_score(args.entrada, args.saida, artefatos, chunksize=args.chunksize,
+                        estado_path=args.state, completo=args.full)
+    print(f"Linhas lidas: {totais['lidas']} | pontuadas: {totais['pontuadas']} | "
+          f"inválidas/ignoradas: {totais['invalidas']}")
+
+
+if __name__ == '__main__':
+    main()
+#
+#------------------- FIM DA PONTUAÇÃO EM LOTE ----------------------------------+
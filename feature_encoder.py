@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+#------------------- CODIFICADOR COMPILADO ----------------------+
+#
+# Versão pré-compilada de transform_new: as tabelas de consulta (Sim/Não,
+# sexo, categorias one-hot de Col13/Col15/Col17) e os parâmetros do scaler
+# de Col11 são extraídos uma única vez de scaler.pkl, encoder.pkl e
+# feature_cols.csv. As respostas são escritas direto numa matriz float32,
+# sem cópias de DataFrame, .map/.replace, pd.concat ou reindex.
+#
+import numpy as np
+import pandas as pd
+
+from pipeline import CATEGORICAL_COLS, YES_NO_COLS, transform_new
+
+SIM_NAO = {'Sim': 1.0, 'Não': 0.0}
+SEXO = {'Masculino': 0.0, 'Feminino': 1.0}
+
+
+def _is_missing(v):
+    return v is None or (isinstance(v, float) and v != v)
+
+
+def _columns(rows):
+    # Normaliza a entrada para {coluna: sequência de valores} e número de linhas
+    if hasattr(rows, 'columns'):                       # DataFrame
+        return {c: rows[c].to_numpy() for c in rows.columns}, len(rows)
+    if isinstance(rows, dict):                         # uma única linha
+        return {c: [v] for c, v in rows.items()}, 1
+    rows = list(rows)                                  # lista de dicionários
+    colunas = {}
+    for i, row in enumerate(rows):
+        for c, v in row.items():
+            colunas.setdefault(c, [None] * len(rows))[i] = v
+    return colunas, len(rows)
+
+
+class CompiledFeatureEncoder:
+    """Codifica respostas (colunas Col01..Col17) na ordem de feature_cols."""
+
+    def __init__(self, feature_cols, mapped_cols, age_col, scale_min, scale,
+                 clip, categories, categorical_cols):
+        self.feature_cols = list(feature_cols)
+        self.n_features = len(self.feature_cols)
+        # coluna -> (índice de saída, tabela de valores) para Sim/Não e sexo
+        self.mapped_cols = mapped_cols
+        # Col11: índice de saída e parâmetros do MinMaxScaler
+        self.age_col = age_col
+        self.scale_min = scale_min
+        self.scale = scale
+        self.clip = clip
+        # coluna categórica -> {categoria: índice de saída}
+        self.categories = categories
+        self.categorical_cols = list(categorical_cols)
+        handled = set(mapped_cols) | set(categories) | {'Col11'}
+        self.onehot_names = {f"{c}_{v}" for c, tabela in categories.items() for v in tabela}
+        # Demais colunas de feature_cols copiadas como número (comportamento do reindex)
+        self.passthrough = {
+            c: j for j, c in enumerate(self.feature_cols)
+            if c not in handled and c not in self.onehot_names
+        }
+
+    @classmethod
+    def from_artifacts(cls, scaler, encoder, feature_cols):
+        indice = {c: j for j, c in enumerate(feature_cols)}
+
+        mapped_cols = {c: (indice[c], SIM_NAO) for c in YES_NO_COLS if c in indice}
+        if 'Col12' in indice:
+            mapped_cols['Col12'] = (indice['Col12'], SEXO)
+
+        age_col = indice.get('Col11')
+        clip = getattr(scaler, 'clip', False)
+        if hasattr(scaler, 'min_'):                    # MinMaxScaler: X*scale + min
+            scale_min, scale = float(scaler.min_[0]), float(scaler.scale_[0])
+        else:                                          # StandardScaler: (X - mean)/scale
+            scale = 1.0 / float(scaler.scale_[0])
+            scale_min = -float(scaler.mean_[0]) * scale
+
+        categorical_cols = list(getattr(encoder, 'feature_names_in_', CATEGORICAL_COLS))
+        categories = {}
+        for col, cats in zip(categorical_cols, encoder.categories_):
+            categories[col] = {
+                cat: indice[f"{col}_{cat}"] for cat in cats if f"{col}_{cat}" in indice
+            }
+        return cls(feature_cols, mapped_cols, age_col, scale_min, scale, clip,
+                   categories, categorical_cols)
+
+    def to_dict(self):
+        # Forma serializável (JSON) das tabelas, usada no pacote de artefatos
+        return {
+            'feature_cols': self.feature_cols,
+            'mapped_cols': {c: [j, tabela] for c, (j, tabela) in self.mapped_cols.items()},
+            'age_col': self.age_col,
+            'scale_min': self.scale_min,
+            'scale': self.scale,
+            'clip': bool(self.clip),
+            'categories': self.categories,
+            'categorical_cols': self.categorical_cols,
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        mapped_cols = {c: (j, tabela) for c, (j, tabela) in d['mapped_cols'].items()}
+        return cls(d['feature_cols'], mapped_cols, d['age_col'], d['scale_min'], d['scale'],
+                   d['clip'], d['categories'], d['categorical_cols'])
+
+    #---------------- Codificação -------------------------------------+
+    def encode(self, rows, out=None):
+        """Codifica uma linha (dict), uma lista de dicts ou um DataFrame.
+
+        Escreve em ``out`` (float32, ao menos n linhas) quando fornecido.
+        Mesmas regras de transform_new: Sim/Não e sexo inválidos levantam
+        ValueError, "?" e vazios viram NaN em Col11 e 'missing' (zeros) nas
+        categóricas, categorias desconhecidas são ignoradas e colunas
+        ausentes ficam com 0.
+        """
+        colunas, n = _columns(rows)
+        if out is None:
+            X = np.zeros((n, self.n_features), dtype=np.float32)
+        else:
+            X = out[:n]
+            X.fill(0)
+
+        for col, (j, tabela) in self.mapped_cols.items():
+            valores = colunas.get(col)
+            if valores is None:
+                continue
+            try:
+                X[:, j] = [tabela[v] for v in valores]
+            except (KeyError, TypeError):
+                raise ValueError(f"Valor inválido em {col}: esperado um de {list(tabela)}") from None
+
+        if self.age_col is not None and 'Col11' in colunas:
+            idade = np.array([np.nan if _is_missing(v) or v == "?" else float(v)
+                              for v in colunas['Col11']], dtype=np.float64)
+            idade = idade * self.scale + self.scale_min
+            if self.clip:
+                idade = np.clip(idade, 0, 1)
+            X[:, self.age_col] = idade
+
+        presentes = [c for c in self.categorical_cols if c in colunas]
+        if presentes and len(presentes) != len(self.categorical_cols):
+            faltantes = [c for c in self.categorical_cols if c not in colunas]
+            raise ValueError(f"Colunas categóricas ausentes: {faltantes}")
+        for col in presentes:
+            tabela = self.categories[col]
+            for i, v in enumerate(colunas[col]):
+                j = tabela.get(v) if isinstance(v, str) else None
+                if j is not None:
+                    X[i, j] = 1.0
+
+        for col, j in self.passthrough.items():
+            if col in colunas:
+                X[:, j] = [np.nan if _is_missing(v) or v == "?" else float(v) for v in colunas[col]]
+        return X
+
+    __call__ = encode
+
+    #---------------- Verificação -------------------------------------+
+    def sample_answers(self, n, seed=0):
+        """Respostas sintéticas (incluindo '?' e categorias desconhecidas)."""
+        rng = np.random.default_rng(seed)
+        dados = {col: rng.choice(list(tabela), size=n) for col, (_, tabela) in self.mapped_cols.items()}
+        idade = rng.integers(12, 17, size=n).astype(object)
+        idade[rng.random(n) < 0.05] = "?"
+        dados['Col11'] = idade
+        for col, tabela in self.categories.items():
+            valores = np.array(list(tabela) + ["?", "Desconhecido"], dtype=object)
+            dados[col] = rng.choice(valores, size=n)
+        return pd.DataFrame(dados)
+
+    def check_equivalence(self, scaler, encoder, df=None, n=500):
+        """Compara com transform_new; levanta ValueError se houver diferença."""
+        if df is None:
+            df = self.sample_answers(n)
+        esperado = transform_new(df, scaler, encoder, self.feature_cols).to_numpy(dtype=np.float32)
+        obtido = self.encode(df)
+        if esperado.shape != obtido.shape or not np.array_equal(esperado, obtido, equal_nan=True):
+            linhas = np.unique(np.nonzero(~np.isclose(esperado, obtido, equal_nan=True))[0])
+            raise ValueError(f"Codificador compilado diverge de transform_new nas linhas {linhas[:10].tolist()}")
+        return len(df)
+#
+#------------------- FIM DO CODIFICADOR COMPILADO ---------------+
@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+#------------------- ARMAZENAMENTO DO FORMULÁRIO ----------------------+
+#
+# Mantém a planilha de respostas em memória, indexada por ID (carimbo de
+# data/hora), e a atualiza em segundo plano. Cada atualização incorpora
+# apenas as linhas com carimbo mais novo do que o último já conhecido, de
+# modo que as consultas por ID e pelo "último ID" não baixam a planilha.
+#
+# Só as colunas usadas pelo modelo são lidas (carimbo + perguntas 1 a 17),
+# com as respostas como 'category' (códigos de 1 byte). No modo 'scan' a
+# planilha não fica em memória: cada consulta percorre o CSV em blocos e
+# para assim que encontra o ID.
+#
+import io
+import re
+import threading
+import time
+import urllib.request
+from collections import defaultdict
+
+import pandas as pd
+
+from process_thread import ProcessThread
+
+COLUNA_CARIMBO = "Carimbo de data/hora"
+FORMATO_CARIMBO = "%d/%m/%Y %H:%M:%S"
+N_PERGUNTAS = 17
+
+# "1. Pergunta..." a "17. Pergunta..." (exportação do formulário) ou "Col01".."Col17"
+_PERGUNTA = re.compile(r'^(?:(\d+)\.|Col(\d{2})$)')
+# Respostas como categorias; o carimbo fica como texto (é o ID)
+TIPOS_FORMULARIO = defaultdict(lambda: 'category', {COLUNA_CARIMBO: str, 'ID': str})
+
+
+def parse_timestamps(ids):
+    # Converte os IDs (texto "dd/mm/aaaa hh:mm:ss") em datas comparáveis
+    ts = pd.to_datetime(ids, format=FORMATO_CARIMBO, errors='coerce')
+    faltantes = ts.isna() & pd.Series(ids).notna().to_numpy()
+    if faltantes.any():
+        # Exportações em outro formato de data: tenta dia primeiro
+        ts = ts.where(~faltantes, pd.to_datetime(ids, dayfirst=True, errors='coerce', format='mixed'))
+    return ts
+
+
+def coluna_do_formulario(nome):
+    # Filtro de usecols: carimbo/ID e perguntas 1..17; o resto é ignorado
+    nome = str(nome)
+    if nome in (COLUNA_CARIMBO, 'ID'):
+        return True
+    m = _PERGUNTA.match(nome)
+    return m is not None and 1 <= int(m.group(1) or m.group(2)) <= N_PERGUNTAS
+
+
+def read_form_csv(fonte, chunksize=None, **kwargs):
+    """``pd.read_csv`` só com as colunas do formulário e tipos compactos."""
+    return pd.read_csv(fonte, usecols=coluna_do_formulario, dtype=TIPOS_FORMULARIO,
+                       chunksize=chunksize, **kwargs)
+
+
+def _compactar(df):
+    # pd.concat de categorias diferentes devolve object: volta para category
+    for coluna in df.columns:
+        if df[coluna].dtype == object:
+            df[coluna] = df[coluna].astype('category')
+    return df
+
+
+class _ContadorBytes:
+    # Arquivo/resposta HTTP que conta os bytes lidos (leitura em blocos)
+    def __init__(self, arquivo):
+        self.arquivo, self.lidos = arquivo, 0
+
+    def read(self, n=-1):
+        dados = self.arquivo.read(n)
+        self.lidos += len(dados)
+        return dados
+
+    def __iter__(self):
+        return iter(self.arquivo)
+
+
+class FormDataStore:
+    """Cache em memória da planilha do formulário, indexada por ID.
+
+    ``source`` pode ser a URL de exportação CSV do Google Sheets, outra URL
+    HTTP ou um arquivo CSV local (qualquer coisa aceita por ``pd.read_csv``).
+    ``mode`` é 'index' (planilha em memória) ou 'scan' (leitura em blocos de
+    ``chunksize`` linhas a cada consulta, sem guardar a planilha).
+    """
+
+    def __init__(self, source, refresh_interval=30.0, min_refresh_interval=5.0,
+                 timeout=30.0, on_fetch=None, mode='index', chunksize=5000):
+        if mode not in ('index', 'scan'):
+            raise ValueError(f"Modo da planilha desconhecido: {mode}")
+        self.source = source
+        self.timeout = timeout
+        self.mode = mode
+        self.chunksize = chunksize
+        # on_fetch(bytes, linhas, segundos): chamado após cada download
+        self.on_fetch = on_fetch
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval
+        self._df = None
+        self._ultimo_ts = None
+        self._ultima_atualizacao = 0.0
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = ProcessThread(self._loop, "form-store-refresh", prepare=self._parar.clear)
+
+    #---------------- Leitura e junção --------------------------------+
+    def _open(self):
+        # CSV como arquivo binário (URL ou arquivo local), lido sob demanda
+        if self.source.startswith(('http://', 'https://')):
+            return urllib.request.urlopen(self.source, timeout=self.timeout)
+        return open(self.source, 'rb')
+
+    def fetch(self):
+        """Conteúdo bruto do CSV (download bloqueante; não altera o índice)."""
+        with self._open() as f:
+            return f.read()
+
+    @staticmethod
+    def _normalizar(df):
+        if COLUNA_CARIMBO in df.columns:
+            df = df.rename(columns={COLUNA_CARIMBO: "ID"})
+        return df.dropna(subset=["ID"])
+
+    def _parse(self, dados, inicio):
+        df = read_form_csv(io.BytesIO(dados))
+        if self.on_fetch is not None:
+            self.on_fetch(len(dados), len(df), time.perf_counter() - inicio)
+        return self._normalizar(df)
+
+    def _scan(self, ids=None):
+        """Percorre o CSV em blocos; para quando todos os ``ids`` aparecerem.
+
+        Sem ``ids``, lê só a coluna do carimbo até o fim e devolve o último
+        ID. Com ``ids``, devolve as linhas encontradas (a primeira ocorrência
+        de cada ID, indexadas por ID).
+        """
+        inicio = time.perf_counter()
+        faltantes = None if ids is None else set(ids)
+        partes, linhas, ultimo = [], 0, None
+        with self._open() as f:
+            contador = _ContadorBytes(f)
+            if faltantes is None:
+                leitor = pd.read_csv(contador, usecols=lambda c: c in (COLUNA_CARIMBO, 'ID'),
+                                     dtype=str, chunksize=self.chunksize)
+            else:
+                leitor = read_form_csv(contador, chunksize=self.chunksize)
+            with leitor:
+                for bloco in leitor:
+                    linhas += len(bloco)
+                    bloco = self._normalizar(bloco)
+                    if faltantes is None:
+                        if len(bloco):
+                            ultimo = bloco["ID"].iloc[-1]
+                        continue
+                    achados = bloco[bloco["ID"].isin(faltantes)].drop_duplicates("ID")
+                    if len(achados):
+                        partes.append(achados)
+                        faltantes -= set(achados["ID"])
+                    if not faltantes:
+                        break
+        if self.on_fetch is not None:
+            self.on_fetch(contador.lidos, linhas, time.perf_counter() - inicio)
+        if ids is None:
+            return ultimo
+        if not partes:
+            return pd.DataFrame(index=pd.Index([], name="ID"))
+        return _compactar(pd.concat(partes)).set_index("ID")
+
+    def _merge(self, df_novo):
+        ts = parse_timestamps(df_novo["ID"])
+        if self._ultimo_ts is not None:
+            manter = (ts > self._ultimo_ts) | (ts.isna() & ~df_novo["ID"].isin(self._df.index))
+            df_novo, ts = df_novo[manter], ts[manter]
+        if df_novo.empty:
+            return 0
+
+        df_novo = df_novo.set_index("ID")
+        if self._df is not None:
+            df_novo = _compactar(pd.concat([self._df, df_novo]))
+        # IDs repetidos: prevalece a submissão mais recente
+        df_novo = df_novo[~df_novo.index.duplicated(keep='last')]
+
+        ts_max = ts.max()
+        if pd.notna(ts_max) and (self._ultimo_ts is None or ts_max > self._ultimo_ts):
+            self._ultimo_ts = ts_max
+        novos = len(df_novo) - (0 if self._df is None else len(self._df))
+        # Troca de referência: leitores concorrentes veem a versão antiga ou a nova
+        self._df = df_novo
+        return novos
+
+    def refresh(self, max_age=None):
+        """Baixa a planilha e incorpora as linhas novas.
+
+        Com ``max_age``, não baixa de novo se a última atualização (inclusive
+        uma feita por outra thread enquanto esta esperava) for mais recente.
+        Retorna o número de linhas novas.
+        """
+        with self._lock:
+            if max_age is not None and time.monotonic() - self._ultima_atualizacao < max_age:
+                return 0
+            inicio = time.perf_counter()
+            df_novo = self._parse(self.fetch(), inicio)
+            self._ultima_atualizacao = time.monotonic()
+            return self._merge(df_novo)
+
+    def incorporate(self, dados, inicio=None):
+        """Incorpora um download feito por fora (conteúdo bruto do CSV).
+
+        Usado pelo modo assíncrono (asgi.py), que baixa a planilha com o seu
+        próprio cliente HTTP. ``inicio``: perf_counter() do início do download.
+        """
+        df_novo = self._parse(dados, time.perf_counter() if inicio is None else inicio)
+        with self._lock:
+            self._ultima_atualizacao = time.monotonic()
+            return self._merge(df_novo)
+
+    def age(self):
+        # Segundos desde a última atualização (infinito se nunca atualizou)
+        if not self._ultima_atualizacao:
+            return float('inf')
+        return time.monotonic() - self._ultima_atualizacao
+
+    #---------------- Atualização em segundo plano --------------------+
+    def _loop(self):
+        while not self._parar.wait(self.refresh_interval):
+            try:
+                self.refresh(max_age=self.refresh_interval / 2)
+            except Exception as e:
+                print(f"Aviso: falha ao atualizar a planilha do formulário: {e}")
+
+    def start(self):
+        if self.refresh_interval and self.mode != 'scan':
+            self._thread.start()
+
+    def stop(self):
+        self._parar.set()
+        self._thread.stop()
+
+    def _ensure_loaded(self):
+        self.start()
+        if self._df is None:
+            self.refresh(max_age=self.min_refresh_interval)
+
+    #---------------- Consultas ---------------------------------------+
+    def lookup(self, id_requerido):
+        """Linha do ID no índice em memória, sem atualizar (None se ausente)."""
+        df = self._df
+        if df is None or id_requerido not in df.index:
+            return None
+        return df.loc[[id_requerido]]
+
+    def ids(self):
+        """IDs do índice em memória, na ordem da planilha, sem atualizar
+        (vazio no modo 'scan', que não mantém índice)."""
+        df = self._df
+        return [] if df is None else df.index.tolist()
+
+    def lookup_latest(self):
+        """Último ID do índice em memória, sem atualizar (None se vazio)."""
+        df = self._df
+        if df is None or df.empty:
+            return None
+        return df.index[-1]
+
+    def get(self, id_requerido):
+        """Retorna o DataFrame (uma linha, indexado por ID) ou None."""
+        if self.mode == 'scan':
+            df = self._scan([id_requerido])
+            return df if len(df) else None
+        self._ensure_loaded()
+        df = self.lookup(id_requerido)
+        if df is None:
+            # Pode ser uma submissão recém-enviada: atualiza (com limite de frequência)
+            self.refresh(max_age=self.min_refresh_interval)
+            df = self.lookup(id_requerido)
+        return df
+
+    def get_many(self, ids):
+        """Retorna as linhas encontradas (indexadas por ID), com no máximo uma atualização."""
+        if self.mode == 'scan':
+            return self._scan(ids) if ids else pd.DataFrame(index=pd.Index([], name="ID"))
+        self._ensure_loaded()
+        df = self._df
+        if ids and (df is None or not pd.Index(ids).isin(df.index).all()):
+            self.refresh(max_age=self.min_refresh_interval)
+            df = self._df
+        if df is None:
+            return pd.DataFrame(index=pd.Index([], name="ID"))
+        return df.loc[df.index.intersection(pd.Index(ids, dtype=object), sort=False)]
+
+    def latest_id(self):
+        # O botão "Ver meu Resultado" é aberto logo após a submissão; garante
+        # que o índice não tenha mais de min_refresh_interval segundos.
+        if self.mode == 'scan':
+            return self._scan()
+        self._ensure_loaded()
+        self.refresh(max_age=self.min_refresh_interval)
+        return self.lookup_latest()
+
+    def __len__(self):
+        return 0 if self._df is None else len(self._df)
+#
+#------------------- FIM DO ARMAZENAMENTO DO FORMULÁRIO ---------------+
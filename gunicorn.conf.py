@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+#------------------- CONFIGURAÇÃO DO GUNICORN ----------------------+
+#
+#   gunicorn -c gunicorn.conf.py app:app
+#
+# Com o backend NumPy (INFERENCE_BACKEND=numpy, de preferência com o pacote
+# ARTIFACT_BUNDLE), o app é carregado uma única vez no mestre antes do fork
+# e os workers compartilham pesos, tabelas do codificador e o restante do
+# heap por copy-on-write (ver worker_memory.py). Com o backend Keras cada
+# worker carrega o próprio TensorFlow, que não é seguro através de fork.
+#
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:' + os.environ.get('PORT', '5000'))
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+
+preload_app = os.environ.get('GUNICORN_PRELOAD',
+                             '1' if os.environ.get('INFERENCE_BACKEND', 'keras').lower() == 'numpy'
+                             else '0') == '1'
+
+
+def when_ready(server):
+    # Com preload o app já foi importado aqui: congela o heap antes dos forks
+    if preload_app:
+        from worker_memory import freeze_heap
+        server.log.info("Heap congelado antes do fork (%d objetos)", freeze_heap())
+
+
+def post_worker_init(worker):
+    from worker_memory import memory_usage
+    uso = memory_usage()
+    if uso:
+        worker.log.info("Worker %s: RSS %.1f MB, privado %.1f MB", worker.pid,
+                        uso['rss'] / 2**20, uso.get('private', uso['rss']) / 2**20)
+#
+#------------------- FIM DA CONFIGURAÇÃO DO GUNICORN ---------------+
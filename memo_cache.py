@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+#------------------- CACHE POR VETOR DE RESPOSTAS ----------------------+
+#
+# Quase toda a entrada do modelo é discreta (Sim/Não, sexo, categorias; só
+# Col11 é contínua), e muitos respondentes enviam exatamente o mesmo vetor
+# codificado. Este cache, indexado pelo hash da linha codificada + versão
+# dos artefatos, guarda a probabilidade ajustada e a classificação, de modo
+# que padrões de resposta repetidos não passam pelo modelo.
+#
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+CAMPOS = ('probabilidade', 'predicao_original', 'classe_predita', 'classificacao', 'interpretacao')
+
+
+class FeatureMemoCache:
+    """Cache LRU limitado de resultados por linha codificada."""
+
+    def __init__(self, max_items=20000, version=''):
+        self.max_items = max_items
+        self.version = version
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def key(self, linha, version=None):
+        h = hashlib.blake2b((self.version if version is None else version).encode(), digest_size=16)
+        h.update(np.ascontiguousarray(linha, dtype=np.float32).tobytes())
+        return h.digest()
+
+    def score(self, X, pontuar, version=None):
+        """Pontua a matriz X usando o cache; só as linhas novas vão a ``pontuar``.
+
+        ``pontuar(X_faltantes)`` devolve o dicionário de arrays de
+        score_matrix/score_predictions; o retorno tem o mesmo formato.
+        ``version`` é a versão dos artefatos usada por ``pontuar`` (padrão:
+        a do cache), para que uma requisição iniciada antes de uma recarga
+        não grave resultados antigos sob a versão nova.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        chaves = [self.key(linha, version) for linha in X]
+        encontrados = {}
+        with self._lock:
+            for i, chave in enumerate(chaves):
+                valor = self._dados.get(chave)
+                if valor is not None:
+                    self._dados.move_to_end(chave)
+                    encontrados[i] = valor
+            self.hits += len(encontrados)
+            self.misses += len(chaves) - len(encontrados)
+
+        faltantes = [i for i in range(len(chaves)) if i not in encontrados]
+        if not faltantes:
+            return self._montar(encontrados, None, faltantes)
+
+        novos = pontuar(X[faltantes])
+        with self._lock:
+            for j, i in enumerate(faltantes):
+                self._dados[chaves[i]] = tuple(novos[campo][j] for campo in CAMPOS)
+                self._dados.move_to_end(chaves[i])
+            while len(self._dados) > self.max_items:
+                self._dados.popitem(last=False)
+                self.evictions += 1
+        return self._montar(encontrados, novos, faltantes)
+
+    @staticmethod
+    def _montar(encontrados, novos, faltantes):
+        n = len(encontrados) + len(faltantes)
+        saida = {
+            'probabilidade': np.empty(n, dtype=np.float64),
+            'predicao_original': np.empty(n, dtype=np.float64),
+            'classe_predita': np.empty(n, dtype=np.int8),
+            'classificacao': np.empty(n, dtype=object),
+            'interpretacao': np.empty(n, dtype=object),
+        }
+        for i, valor in encontrados.items():
+            for campo, v in zip(CAMPOS, valor):
+                saida[campo][i] = v
+        if faltantes:
+            for campo in CAMPOS:
+                saida[campo][faltantes] = novos[campo]
+        return saida
+
+    def clear(self):
+        with self._lock:
+            self._dados.clear()
+
+    def __len__(self):
+        return len(self._dados)
+#
+#------------------- FIM DO CACHE POR VETOR DE RESPOSTAS ---------------+
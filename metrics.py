@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+#------------------- MÉTRICAS (FORMATO PROMETHEUS) ----------------------+
+#
+# Contadores e histogramas em memória, baratos o bastante para ficarem
+# sempre ligados, e a renderização no formato de texto do Prometheus
+# servida pela rota /metrics. Os valores são por processo (cada worker
+# expõe os seus).
+#
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Limites (segundos) dos baldes dos histogramas de latência
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(chaves, valores, extra=()):
+    pares = list(zip(chaves, valores)) + list(extra)
+    if not pares:
+        return ''
+    texto = ','.join('{}="{}"'.format(k, str(v).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+                     for k, v in pares)
+    return '{' + texto + '}'
+
+
+def _numero(v):
+    if v == float('inf'):
+        return '+Inf'
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+def format_histogram(name, buckets, counts, total, labelnames=(), labelvalues=()):
+    """Linhas de um histograma a partir de contagens não cumulativas por balde."""
+    linhas, acumulado = [], 0
+    for limite, contagem in zip(tuple(buckets) + (float('inf'),), counts):
+        acumulado += contagem
+        linhas.append(f"{name}_bucket{_labels(labelnames, labelvalues, [('le', _numero(limite))])} {acumulado}")
+    linhas.append(f"{name}_sum{_labels(labelnames, labelvalues)} {_numero(float(total))}")
+    linhas.append(f"{name}_count{_labels(labelnames, labelvalues)} {acumulado}")
+    return linhas
+
+
+class Counter:
+
+    def __init__(self, name, help, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        chave = tuple(labels.get(n, '') for n in self.labelnames)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + amount
+
+    def value(self, **labels):
+        return self._valores.get(tuple(labels.get(n, '') for n in self.labelnames), 0)
+
+    def render(self):
+        linhas = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            itens = sorted(self._valores.items())
+        if not itens and not self.labelnames:
+            itens = [((), 0)]
+        linhas += [f"{self.name}{_labels(self.labelnames, k)} {_numero(v)}" for k, v in itens]
+        return linhas
+
+
+class Histogram:
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}   # labels -> [contagens por balde..., soma]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        chave = tuple(labels.get(n, '') for n in self.labelnames)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = [0] * (len(self.buckets) + 2)
+            serie[i] += 1
+            serie[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - inicio, **labels)
+
+    def render(self):
+        linhas = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            itens = sorted((k, list(v)) for k, v in self._series.items())
+        for chave, serie in itens:
+            linhas += format_histogram(self.name, self.buckets, serie[:-1], serie[-1],
+                                       self.labelnames, chave)
+        return linhas
+
+
+class Gauge:
+    """Valor lido no momento da coleta (ex.: tamanho de um cache)."""
+
+    def __init__(self, name, help, fn, type='gauge'):
+        self.name, self.help, self.fn, self.type = name, help, fn, type
+
+    def render(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}",
+                f"{self.name} {_numero(self.fn())}"]
+
+
+class Registry:
+
+    def __init__(self):
+        self._metricas = []
+        self._coletores = []
+
+    def counter(self, name, help, labelnames=()):
+        return self._registrar(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._registrar(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name, help, fn, type='gauge'):
+        return self._registrar(Gauge(name, help, fn, type))
+
+    def collector(self, fn):
+        # fn() devolve linhas prontas no formato de texto (métricas externas)
+        self._coletores.append(fn)
+        return fn
+
+    def _registrar(self, metrica):
+        self._metricas.append(metrica)
+        return metrica
+
+    def render(self):
+        linhas = []
+        for metrica in self._metricas:
+            try:
+                linhas += metrica.render()
+            except Exception as e:
+                print(f"Aviso: falha ao coletar {metrica.name}: {e}")
+        for coletor in self._coletores:
+            linhas += coletor()
+        return '\n'.join(linhas) + '\n'
+#
+#------------------- FIM DAS MÉTRICAS -----------------------------------+
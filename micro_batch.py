@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+#------------------- AGRUPAMENTO DE PREDIÇÕES (MICRO-BATCH) ----------------------+
+#
+# Requisições /predict simultâneas (ex.: uma turma inteira abrindo o link)
+# entram numa fila; uma thread junta as linhas que chegam dentro de uma
+# janela curta (ou até o tamanho máximo do lote), faz uma única chamada ao
+# modelo e devolve a cada requisição a sua parte do resultado.
+#
+import queue
+import threading
+import time
+
+import numpy as np
+
+from process_thread import ProcessThread
+
+# Limites superiores dos baldes do histograma de tamanho de lote
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+# Limites superiores (segundos) dos baldes do histograma de espera na fila
+QUEUE_WAIT_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+
+class _Pedido:
+    __slots__ = ('X', 'fn', 'chegada', 'pronto', 'resultado', 'erro')
+
+    def __init__(self, X, fn):
+        self.X = X
+        self.fn = fn
+        self.chegada = time.perf_counter()
+        self.pronto = threading.Event()
+        self.resultado = None
+        self.erro = None
+
+
+def _balde(valor, limites):
+    for i, limite in enumerate(limites):
+        if valor <= limite:
+            return i
+    return len(limites)
+
+
+class MicroBatcher:
+    """Substituto de ``model.predict`` que agrupa chamadas concorrentes."""
+
+    def __init__(self, predict_fn=None, max_batch_size=32, max_wait=0.005):
+        # predict_fn: modelo padrão; sem ele, cada chamada informa o seu (bind)
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._fila = queue.Queue()
+        self._thread = ProcessThread(self._loop, "micro-batch", prepare=self._nova_fila)
+        self._lock = threading.Lock()
+        # Contadores
+        self.batches = 0
+        self.rows = 0
+        self.batch_size_hist = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+        self.queue_wait_hist = [0] * (len(QUEUE_WAIT_BUCKETS) + 1)
+        self.queue_wait_sum = 0.0
+        self.queue_wait_max = 0.0
+
+    def _nova_fila(self):
+        # A fila herdada do mestre pode ter ficado com o lock interno preso
+        self._fila = queue.Queue()
+
+    def predict(self, X, verbose=0, predict_fn=None):
+        # predict_fn: modelo desta chamada (padrão: o do construtor); só
+        # linhas do mesmo modelo são agrupadas numa chamada
+        predict_fn = predict_fn or self.predict_fn
+        if predict_fn is None:
+            raise TypeError("MicroBatcher sem predict_fn: informe-o na chamada ou use bind()")
+        self._thread.start()
+        pedido = _Pedido(np.asarray(X, dtype=np.float32), predict_fn)
+        self._fila.put(pedido)
+        pedido.pronto.wait()
+        if pedido.erro is not None:
+            raise pedido.erro
+        return pedido.resultado
+
+    __call__ = predict
+
+    def bind(self, predict_fn):
+        """Objeto com ``predict`` que usa esta fila com outro modelo."""
+        return _Vinculado(self, predict_fn)
+
+    #---------------- Thread de agrupamento ---------------------------+
+    def _coletar(self):
+        pedidos = [self._fila.get()]
+        linhas = len(pedidos[0].X)
+        prazo = pedidos[0].chegada + self.max_wait
+        while linhas < self.max_batch_size:
+            restante = prazo - time.perf_counter()
+            try:
+                pedido = self._fila.get(timeout=restante) if restante > 0 else self._fila.get_nowait()
+            except queue.Empty:
+                break
+            pedidos.append(pedido)
+            linhas += len(pedido.X)
+        return pedidos, linhas
+
+    def _loop(self):
+        while True:
+            pedidos, _ = self._coletar()
+            # Normalmente um só grupo; dois quando a janela cruza uma troca de modelo
+            grupos = {}
+            for p in pedidos:
+                grupos.setdefault(p.fn, []).append(p)
+            for fn, grupo in grupos.items():
+                self._executar(fn, grupo)
+
+    def _executar(self, fn, pedidos):
+        inicio = time.perf_counter()
+        try:
+            saida = np.asarray(fn(np.concatenate([p.X for p in pedidos])))
+            pos = 0
+            for p in pedidos:
+                p.resultado = saida[pos:pos + len(p.X)]
+                pos += len(p.X)
+        except Exception as e:
+            for p in pedidos:
+                p.erro = e
+        self._registrar(pedidos, sum(len(p.X) for p in pedidos), inicio)
+        for p in pedidos:
+            p.pronto.set()
+
+    def _registrar(self, pedidos, linhas, inicio):
+        with self._lock:
+            self.batches += 1
+            self.rows += linhas
+            self.batch_size_hist[_balde(linhas, BATCH_SIZE_BUCKETS)] += 1
+            for p in pedidos:
+                espera = inicio - p.chegada
+                self.queue_wait_hist[_balde(espera, QUEUE_WAIT_BUCKETS)] += 1
+                self.queue_wait_sum += espera
+                self.queue_wait_max = max(self.queue_wait_max, espera)
+
+    def stats(self):
+        with self._lock:
+            pedidos = sum(self.queue_wait_hist)
+            return {
+                'batches': self.batches,
+                'rows': self.rows,
+                'requests': pedidos,
+                'mean_batch_size': self.rows / self.batches if self.batches else 0.0,
+                'batch_size_hist': dict(zip(BATCH_SIZE_BUCKETS + (float('inf'),), self.batch_size_hist)),
+                'queue_wait_hist': dict(zip(QUEUE_WAIT_BUCKETS + (float('inf'),), self.queue_wait_hist)),
+                'queue_wait_mean': self.queue_wait_sum / pedidos if pedidos else 0.0,
+                'queue_wait_max': self.queue_wait_max,
+            }
+
+
+class _Vinculado:
+    __slots__ = ('batcher', 'predict_fn')
+
+    def __init__(self, batcher, predict_fn):
+        self.batcher = batcher
+        self.predict_fn = predict_fn
+
+    def predict(self, X, verbose=0):
+        return self.batcher.predict(X, verbose, self.predict_fn)
+
+    __call__ = predict
+#
+#------------------- FIM DO AGRUPAMENTO DE PREDIÇÕES -----------------------------+
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+#------------------- MOTOR DE INFERÊNCIA EM NUMPY ----------------------+
+#
+# Lê a arquitetura (config.json) e os pesos (model.weights.h5) direto do
+# arquivo .keras e executa o forward pass como multiplicações de matrizes
+# em NumPy, sem o overhead por chamada do model.predict (e sem importar o
+# TensorFlow). Suporta redes sequenciais de camadas Dense; Dropout é a
+# identidade na inferência.
+#
+import json
+import zipfile
+
+import numpy as np
+
+
+def _relu(x):
+    # fmax (não maximum): NaN vira 0, como no model.predict do Keras (grafo
+    # compilado); com maximum o NaN de uma idade '?' chegaria à saída
+    return np.fmax(x, 0, out=x)
+
+
+def _sigmoid(x):
+    # Forma estável: evita overflow de exp() para entradas muito negativas
+    e = np.exp(-np.abs(x))
+    return np.where(x >= 0, 1 / (1 + e), e / (1 + e)).astype(x.dtype, copy=False)
+
+
+def _softmax(x):
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': _relu,
+    'sigmoid': _sigmoid,
+    'tanh': np.tanh,
+    'softmax': _softmax,
+}
+IGNORED_LAYERS = {'InputLayer', 'Dropout'}
+
+
+class NumpyDenseModel:
+    """Rede densa com a mesma interface de predição do modelo Keras."""
+
+    def __init__(self, layers):
+        # layers: lista de (kernel, bias ou None, nome da ativação)
+        for _, _, activation in layers:
+            if activation not in ACTIVATIONS:
+                raise ValueError(f"Ativação não suportada: {activation}")
+        # Todos os pesos num único buffer contíguo e somente leitura: as
+        # páginas nunca são escritas, então continuam compartilhadas entre
+        # os workers criados por fork (gunicorn com preload_app)
+        layers = [(np.asarray(W, dtype=np.float32),
+                   None if b is None else np.asarray(b, dtype=np.float32),
+                   activation)
+                  for W, b, activation in layers]
+        self.weights = np.empty(sum(W.size + (0 if b is None else b.size) for W, b, _ in layers),
+                                dtype=np.float32)
+        self.layers, inicio = [], 0
+        for W, b, activation in layers:
+            kernel, inicio = self._view(W, inicio)
+            bias, inicio = (None, inicio) if b is None else self._view(b, inicio)
+            self.layers.append((kernel, bias, activation))
+        self.weights.flags.writeable = False
+
+    def _view(self, array, inicio):
+        fim = inicio + array.size
+        self.weights[inicio:fim] = array.ravel()
+        vista = self.weights[inicio:fim].reshape(array.shape)
+        vista.flags.writeable = False
+        return vista, fim
+
+    @property
+    def input_dim(self):
+        return self.layers[0][0].shape[0]
+
+    @classmethod
+    def from_keras_file(cls, path):
+        import h5py
+
+        with zipfile.ZipFile(path) as z:
+            config = json.loads(z.read('config.json'))
+            with z.open('model.weights.h5') as f, h5py.File(f, 'r') as h5:
+                layers = []
+                for layer in config['config']['layers']:
+                    tipo, cfg = layer['class_name'], layer['config']
+                    if tipo in IGNORED_LAYERS:
+                        continue
+                    if tipo != 'Dense':
+                        raise ValueError(f"Camada não suportada pelo backend NumPy: {tipo}")
+                    pesos = h5['layers'][cfg['name']]['vars']
+                    W = pesos['0'][()]
+                    b = pesos['1'][()] if cfg.get('use_bias', True) else None
+                    layers.append((W, b, cfg.get('activation', 'linear')))
+        return cls(layers)
+
+    def to_arrays(self):
+        # Pesos como {nome: array} e a lista de ativações (pacote de artefatos)
+        arrays, ativacoes = {}, []
+        for i, (W, b, activation) in enumerate(self.layers):
+            arrays[f'layer{i}_kernel'] = W
+            if b is not None:
+                arrays[f'layer{i}_bias'] = b
+            ativacoes.append(activation)
+        return arrays, ativacoes
+
+    @classmethod
+    def from_arrays(cls, arrays, ativacoes):
+        return cls([(arrays[f'layer{i}_kernel'], arrays.get(f'layer{i}_bias'), activation)
+                    for i, activation in enumerate(ativacoes)])
+
+    def predict(self, X, verbose=0, batch_size=None):
+        # verbose/batch_size: aceitos só por compatibilidade com model.predict
+        h = np.asarray(X, dtype=np.float32)
+        if h.ndim == 1:
+            h = h.reshape(1, -1)
+        for W, b, activation in self.layers:
+            h = h @ W
+            if b is not None:
+                h += b
+            h = ACTIVATIONS[activation](h)
+        return h
+
+    __call__ = predict
+
+
+def check_equivalence(numpy_model, keras_model, X=None, atol=1e-5, n=256, seed=0,
+                      feature_encoder=None):
+    """Compara as saídas dos dois backends; levanta ValueError se divergirem.
+
+    Sem ``X``, usa respostas sintéticas codificadas por ``feature_encoder``
+    (com idades '?', que viram NaN, e Col11 escalada) ou, sem codificador,
+    linhas de 0/1. Retorna a maior diferença absoluta encontrada.
+    """
+    if X is None and feature_encoder is not None:
+        X = feature_encoder.encode(feature_encoder.sample_answers(n, seed))
+    elif X is None:
+        rng = np.random.default_rng(seed)
+        X = rng.integers(0, 2, size=(n, numpy_model.input_dim)).astype(np.float32)
+    esperado = np.asarray(keras_model.predict(X, verbose=0), dtype=np.float64)
+    obtido = np.asarray(numpy_model.predict(X), dtype=np.float64)
+    if esperado.shape != obtido.shape or not np.array_equal(np.isnan(esperado), np.isnan(obtido)):
+        raise ValueError("Backend NumPy diverge do Keras (formato ou posições de NaN diferentes)")
+    diferenca = float(np.nanmax(np.abs(esperado - obtido))) if np.isfinite(esperado).any() else 0.0
+    if diferenca > atol:
+        raise ValueError(
+            f"Backend NumPy diverge do Keras (diferença máxima {diferenca:.3g}, tolerância {atol:g})")
+    return diferenca
+
+
+def load_inference_model(path, backend='keras', verify=False, feature_encoder=None):
+    """Carrega o modelo com o backend escolhido ('keras' ou 'numpy').
+
+    ``feature_encoder``: usado por ``verify`` para comparar os backends em
+    respostas codificadas (ver check_equivalence).
+    """
+    if backend == 'numpy':
+        modelo = NumpyDenseModel.from_keras_file(path)
+        if verify:
+            from tensorflow.keras.models import load_model
+            diferenca = check_equivalence(modelo, load_model(path), feature_encoder=feature_encoder)
+            print(f"Backend NumPy verificado contra o Keras (diferença máxima {diferenca:.3g})")
+        return modelo
+    if backend == 'keras':
+        from tensorflow.keras.models import load_model
+        return load_model(path)
+    raise ValueError(f"Backend de inferência desconhecido: {backend}")
+#
+#------------------- FIM DO MOTOR DE INFERÊNCIA ------------------------+
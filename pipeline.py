@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+#------------------- PIPELINE DE PREDIÇÃO ----------------------+
+#
+# transformação -> modelo -> mistura com o te_score (PPV) -> classificação,
+# operando sobre lotes inteiros (uma linha é só um lote de tamanho 1).
+#
+import numpy as np
+import pandas as pd
+
+YES_NO_COLS = ['Col01','Col02','Col03','Col04','Col05','Col06',
+               'Col07','Col08','Col09','Col10','Col14','Col16']
+CATEGORICAL_COLS = ['Col13', 'Col15', 'Col17']
+
+
+#------------------- DEFINIÇÃO DE FUNÇÕES ----------------------+
+def transform_new(df_new, scaler, encoder, feature_cols):
+    # Respostas lidas como 'category' (read_form_csv) voltam a valores simples
+    df = df_new.astype({c: object for c, tipo in df_new.dtypes.items()
+                        if isinstance(tipo, pd.CategoricalDtype)})
+    yes_no_cols = YES_NO_COLS
+    for col in yes_no_cols:
+        if col in df.columns:
+            df[col] = df[col].map({'Sim': 1, 'Não': 0}).astype('int8')
+
+    df.replace("?", np.nan, inplace=True)
+
+    if 'Col12' in df.columns:
+        df['Col12'] = df['Col12'].map({'Masculino': 0, 'Feminino': 1}).astype('int8')
+
+    if 'Col11' in df.columns:
+        df[['Col11']] = scaler.transform(df[['Col11']].astype(float))
+
+    categorical_cols = CATEGORICAL_COLS
+    for c in categorical_cols:
+        if c in df.columns:
+            df[c] = df[c].fillna('missing')
+
+    present_cats = [c for c in categorical_cols if c in df.columns]
+    if present_cats:
+        encoded = encoder.transform(df[present_cats])
+        feature_names = encoder.get_feature_names_out(present_cats)
+        df = df.drop(columns=present_cats).reset_index(drop=True)
+        df = pd.concat([df, pd.DataFrame(encoded, columns=feature_names)], axis=1)
+
+    df = df.reindex(columns=feature_cols, fill_value=0)
+    return df
+
+
+def rename_form_columns(df):
+    # Renomeia colunas para: Col1, Col2, ... Col17 ("1. Pergunta..." -> "Col01")
+    if df.columns.astype(str).str.startswith(('1. ', '2. ', '3. ')).any():
+        novo_nome_colunas = {
+            col: f"Col{int(col.split('.')[0]):02d}"
+            for col in df.columns
+            if col.split('.')[0].isdigit()
+        }
+        df = df.rename(columns=novo_nome_colunas)
+    return df
+
+
+def te_score_blend(X, predicoes, parametros_ppv):
+    # ==============================================================================================
+    #        USAR PARÂMETROS DO TREINO (NÃO DO VALIDAÇÃO)
+    # ==============================================================================================
+    ppvs = parametros_ppv['ppvs']
+    te_score_min_treino = parametros_ppv['te_score_min']
+    te_score_max_treino = parametros_ppv['te_score_max']
+    alpha = parametros_ppv['alpha']
+
+    # As primeiras 10 colunas da matriz transformada já são numéricas (1/0)
+    if X.shape[1] >= 10:
+        te_score = np.asarray(X[:, :10], dtype=np.float64) @ ppvs
+    else:
+        te_score = np.zeros(X.shape[0])
+        print("Aviso: matriz transformada não tem 10 colunas")
+
+    te_score_norm = (te_score - te_score_min_treino) / (te_score_max_treino - te_score_min_treino)
+    return (1 - alpha) * predicoes + alpha * te_score_norm
+
+
+def classification_bands(t_o):
+    """Limites inferiores, classificações e interpretações para o threshold t_o."""
+    Delta = 0.5*t_o
+    if t_o == 0.5:
+        limites = [Delta, 2*Delta, 3*Delta]
+        classes = ["Baixa", "Leve", "Moderada", "Alta"]
+        interpretacoes = ["improvável", "possível", "provável", "muito provável"]
+    elif t_o == 0.45:
+        limites = [Delta, 2*Delta, 0.55, 0.775]
+        classes = ["Baixa", "Sinal Inicial", "Leve", "Moderada", "Alta"]
+        interpretacoes = ["improvável", "recomenda-se observação", "possível",
+                          "provável", "muito provável"]
+    elif t_o == 0.4:
+        limites = [Delta, 2*Delta, 3*Delta, 4*Delta]
+        classes = ["Baixa", "Baixa a Leve", "Leve", "Moderada", "Alta"]
+        interpretacoes = ["improvável", "possibilidade não descartada", "possível",
+                          "provável", "muito provável"]
+    else:
+        raise ValueError(f"Threshold sem faixas de classificação definidas: {t_o}")
+    return np.array(limites), np.array(classes, dtype=object), np.array(interpretacoes, dtype=object)
+
+
+def classify_scores(resultados, t_o):
+    """Classifica um vetor de probabilidades ajustadas nas faixas de t_o."""
+    resultados = np.asarray(resultados, dtype=np.float64)
+    # NaN não falha nas comparações abaixo e cairia na última faixa ("Alta"):
+    # vem de entrada não numérica (ex.: idade '?') e não pode ser classificado
+    if not np.isfinite(resultados).all():
+        raise ValueError("Probabilidade ajustada não finita (resposta com valor não numérico)")
+    if ((resultados < 0) | (resultados > 1)).any():
+        raise ValueError("Probabilidade ajustada fora do intervalo [0, 1]")
+    limites, classes, interpretacoes = classification_bands(t_o)
+    faixa = np.searchsorted(limites, resultados, side='right')
+    return {
+        'classe_predita': (resultados > t_o).astype(np.int8),
+        'classificacao': classes[faixa],
+        'interpretacao': interpretacoes[faixa],
+    }
+
+
+def score_predictions(X, predicoes, t_o, parametros_ppv):
+    """Mistura as predições do modelo com o te_score e classifica."""
+    predicoes = np.asarray(predicoes, dtype=np.float64).reshape(-1)
+    resultado = te_score_blend(X, predicoes, parametros_ppv)
+    saida = classify_scores(resultado, t_o)
+    saida['predicao_original'] = predicoes
+    saida['probabilidade'] = resultado
+    return saida
+
+
+def score_matrix(X, model, t_o, parametros_ppv):
+    """Pontua uma matriz já transformada com uma única chamada ao modelo."""
+    X = np.asarray(X, dtype=np.float32)
+    return score_predictions(X, model.predict(X, verbose=0), t_o, parametros_ppv)
+
+
+NON_FINITE_ERROR = "Resposta com valor não numérico (ex.: idade '?' ou vazia)"
+
+
+def finite_rows(X):
+    """Máscara das linhas codificadas sem NaN (idade '?' ou vazia em Col11).
+
+    Essas linhas não vão ao modelo: a saída dependeria do backend e não das
+    respostas (a ReLU do model.predict do Keras zera o NaN).
+    """
+    return np.isfinite(X).all(axis=1)
+
+
+def require_finite(X):
+    """Levanta ValueError se alguma linha codificada não for finita."""
+    if not finite_rows(X).all():
+        raise ValueError(NON_FINITE_ERROR)
+
+
+def score_finite_rows(X, score):
+    """Pontua só as linhas finitas de X, numa única chamada a ``score``.
+
+    Retorna (saida, posicoes): posicoes[i] é o índice da linha i em
+    ``saida``, ou -1 se ela não é finita (saida é None sem nenhuma válida).
+    """
+    validas = finite_rows(X)
+    posicoes = np.where(validas, np.cumsum(validas) - 1, -1)
+    if not validas.any():
+        return None, posicoes
+    return score(X[validas]), posicoes
+
+
+def score_frame(df, feature_encoder, model, t_o, parametros_ppv):
+    """Renomeia, codifica e pontua um DataFrame de respostas em lote.
+
+    ``feature_encoder`` é um CompiledFeatureEncoder (ou qualquer função que
+    devolva a matriz na ordem de feature_cols). Levanta ValueError se alguma
+    linha não for finita (ver score_finite_rows para pontuar as demais).
+    """
+    df = rename_form_columns(df)
+    X = feature_encoder(df)
+    require_finite(X)
+    return score_matrix(X, model, t_o, parametros_ppv)
+#---------------- FIM DE DEFINIÇÃO DE FUNÇÕES ----------------+
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+#------------------- THREAD POR PROCESSO ----------------------+
+#
+# Com o gunicorn em modo preload, os objetos são criados no processo mestre
+# e herdados pelos workers no fork, mas as threads não: um worker herda o
+# objeto com a thread de atualização (ou a fila com a sua thread) já
+# "iniciada" e sem ninguém rodando. ProcessThread guarda o PID em que a
+# thread foi iniciada e, na primeira chamada de start() em outro processo,
+# inicia uma nova. Usado pela atualização da planilha (form_store.py), pelo
+# observador dos artefatos (artifact_registry.py) e pelo micro-batch
+# (micro_batch.py).
+#
+import os
+import threading
+
+
+class ProcessThread:
+    """Thread daemon iniciada sob demanda, no máximo uma por processo."""
+
+    def __init__(self, target, name, prepare=None):
+        # prepare(): chamado no processo novo antes da thread iniciar (ex.:
+        # recriar a fila ou limpar o evento de parada herdados do mestre)
+        self.target = target
+        self.name = name
+        self.prepare = prepare
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._pid == os.getpid()
+
+    def start(self):
+        """Inicia a thread neste processo, se ainda não iniciada; True se iniciou."""
+        if self._pid == os.getpid():
+            return False
+        with self._lock:
+            if self._pid == os.getpid():
+                return False
+            if self.prepare is not None:
+                self.prepare()
+            threading.Thread(target=self.target, name=self.name, daemon=True).start()
+            # Só depois de pronta: quem vê o PID atual pode usar o que prepare() criou
+            self._pid = os.getpid()
+            return True
+
+    def stop(self):
+        # A thread para pelo sinal do dono (ex.: um Event); aqui só permite reiniciar
+        self._pid = None
+#
+#------------------- FIM DA THREAD POR PROCESSO ---------------+
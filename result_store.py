@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+#------------------- ARMAZENAMENTO DE RESULTADOS ----------------------+
+#
+# Backends intercambiáveis para o cache de resultados por ID:
+#   - MemoryResultStore: OrderedDict no processo (comportamento original);
+#   - SQLiteResultStore: arquivo local em modo WAL, compartilhado por todos
+#     os workers e preservado entre reinícios.
+# Ambos fazem despejo LRU, expiração por TTL e marcam cada entrada com a
+# versão dos artefatos do modelo: resultados de outra versão são ignorados.
+#
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResultStore:
+    """Interface comum (também aceita o uso como dicionário)."""
+
+    def __init__(self, max_items=5000, ttl=None, version=''):
+        self.max_items = max_items
+        self.ttl = ttl or None
+        self.version = version
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        raise NotImplementedError
+
+    def set(self, key, value, version=None):
+        # version: versão dos artefatos que produziu o valor (padrão: a atual)
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def __getitem__(self, key):
+        valor = self.get(key)
+        if valor is None:
+            raise KeyError(key)
+        return valor
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+
+class MemoryResultStore(ResultStore):
+
+    def __init__(self, max_items=5000, ttl=None, version=''):
+        super().__init__(max_items, ttl, version)
+        self._dados = OrderedDict()   # chave -> (versão, expira_em, valor)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._dados.get(key)
+            if item is None:
+                return default
+            versao, expira_em, valor = item
+            if versao != self.version or (expira_em is not None and expira_em < time.time()):
+                del self._dados[key]
+                return default
+            self._dados.move_to_end(key)
+            return valor
+
+    def set(self, key, value, version=None):
+        expira_em = time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            self._dados[key] = (self.version if version is None else version, expira_em, value)
+            self._dados.move_to_end(key)
+            while len(self._dados) > self.max_items:
+                self._dados.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._dados.clear()
+
+    def __len__(self):
+        return len(self._dados)
+
+
+class SQLiteResultStore(ResultStore):
+
+    def __init__(self, path, max_items=5000, ttl=None, version=''):
+        super().__init__(max_items, ttl, version)
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS resultados (
+                    chave TEXT PRIMARY KEY,
+                    versao TEXT NOT NULL,
+                    valor TEXT NOT NULL,
+                    criado_em REAL NOT NULL,
+                    acessado_em REAL NOT NULL
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_resultados_acesso ON resultados (acessado_em)")
+
+    def _conn(self):
+        # Uma conexão por thread e por processo (conexões não sobrevivem ao fork)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key, default=None):
+        conn = self._conn()
+        linha = conn.execute(
+            "SELECT versao, valor, criado_em FROM resultados WHERE chave = ?", (key,)).fetchone()
+        if linha is None:
+            return default
+        versao, valor, criado_em = linha
+        agora = time.time()
+        if versao != self.version:
+            # Outra versão do modelo (ex.: workers em atualização): ignora, sem apagar
+            return default
+        if self.ttl and criado_em + self.ttl < agora:
+            conn.execute("DELETE FROM resultados WHERE chave = ? AND criado_em = ?", (key, criado_em))
+            return default
+        conn.execute("UPDATE resultados SET acessado_em = ? WHERE chave = ?", (agora, key))
+        return json.loads(valor)
+
+    def set(self, key, value, version=None):
+        conn = self._conn()
+        agora = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO resultados (chave, versao, valor, criado_em, acessado_em) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, self.version if version is None else version, json.dumps(value, ensure_ascii=False), agora, agora))
+        excesso = len(self) - self.max_items
+        if excesso > 0:
+            # Despejo LRU; entradas de outras versões saem primeiro
+            cursor = conn.execute(
+                "DELETE FROM resultados WHERE chave IN ("
+                " SELECT chave FROM resultados"
+                " ORDER BY versao = ?, acessado_em LIMIT ?)",
+                (self.version, excesso))
+            self.evictions += cursor.rowcount
+
+    def clear(self):
+        self._conn().execute("DELETE FROM resultados")
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM resultados").fetchone()[0]
+
+
+def create_result_store(backend='memory', path=None, max_items=5000, ttl=None, version=''):
+    """Cria o backend escolhido ('memory' ou 'sqlite')."""
+    if backend == 'memory':
+        return MemoryResultStore(max_items=max_items, ttl=ttl, version=version)
+    if backend == 'sqlite':
+        return SQLiteResultStore(path, max_items=max_items, ttl=ttl, version=version)
+    raise ValueError(f"Backend de resultados desconhecido: {backend}")
+#
+#------------------- FIM DO ARMAZENAMENTO DE RESULTADOS ---------------+
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+#------------------- TESTES DO CODIFICADOR COMPILADO ----------------------+
+#
+# O CompiledFeatureEncoder precisa gerar exatamente a mesma matriz que
+# transform_new (bit a bit, NaN nas mesmas posições) com os artefatos do
+# repositório, e rejeitar as mesmas respostas inválidas.
+#
+#   python -m pytest -q test_feature_encoder.py
+#
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from artifacts import BASE_DIR, ENCODER_FILE, FEATURE_COLS_FILE, SCALER_FILE
+from benchmarks.synthetic_form import escrever_planilha
+from feature_encoder import CompiledFeatureEncoder
+from form_store import COLUNA_CARIMBO, read_form_csv
+from pipeline import YES_NO_COLS, rename_form_columns, transform_new
+
+
+@pytest.fixture(scope='module')
+def artefatos():
+    scaler = joblib.load(os.path.join(BASE_DIR, SCALER_FILE))
+    encoder = joblib.load(os.path.join(BASE_DIR, ENCODER_FILE))
+    feature_cols = pd.read_csv(os.path.join(BASE_DIR, FEATURE_COLS_FILE), header=None).iloc[:, 0].tolist()
+    codificador = CompiledFeatureEncoder.from_artifacts(scaler, encoder, feature_cols)
+    return scaler, encoder, feature_cols, codificador
+
+
+def referencia(df, artefatos):
+    scaler, encoder, feature_cols, _ = artefatos
+    return transform_new(df, scaler, encoder, feature_cols).to_numpy(dtype=np.float32)
+
+
+def assert_identicas(esperado, obtido):
+    assert esperado.dtype == obtido.dtype == np.float32
+    assert esperado.shape == obtido.shape
+    # Mesmos bits, inclusive NaN nas mesmas posições
+    assert np.array_equal(esperado.view(np.uint32), obtido.view(np.uint32))
+
+
+def test_encode_igual_a_transform_new(artefatos):
+    codificador = artefatos[3]
+    df = codificador.sample_answers(2000)
+    # A amostra cobre idade '?' e categorias fora do encoder
+    assert (df['Col11'] == '?').any()
+    assert all((df[c] == 'Desconhecido').any() and (df[c] == '?').any() for c in codificador.categories)
+    assert_identicas(referencia(df, artefatos), codificador.encode(df))
+
+
+def test_encode_linha_e_lista_de_dicts(artefatos):
+    codificador = artefatos[3]
+    df = codificador.sample_answers(20, seed=1)
+    esperado = referencia(df, artefatos)
+    linhas = df.to_dict('records')
+    assert_identicas(esperado, codificador.encode(linhas))
+    assert_identicas(esperado[:1], codificador.encode(linhas[0]))
+
+
+def test_encode_planilha_lida_com_tipos_compactos(artefatos, tmp_path):
+    codificador = artefatos[3]
+    caminho = escrever_planilha(str(tmp_path / 'planilha.csv'), 500, extras=2)
+    df = rename_form_columns(read_form_csv(caminho)).drop(columns=[COLUNA_CARIMBO])
+    assert any(isinstance(t, pd.CategoricalDtype) for t in df.dtypes)
+    assert_identicas(referencia(df, artefatos), codificador.encode(df))
+
+
+@pytest.mark.parametrize('coluna, valor', [(YES_NO_COLS[0], 'Talvez'), (YES_NO_COLS[-1], 'sim'),
+                                           ('Col12', 'Outro'), ('Col12', None)])
+def test_valores_invalidos_levantam_value_error(artefatos, coluna, valor):
+    codificador = artefatos[3]
+    df = codificador.sample_answers(3, seed=2)
+    df[coluna] = df[coluna].astype(object)
+    df.loc[1, coluna] = valor
+    with pytest.raises(ValueError):
+        codificador.encode(df)
+    with pytest.raises(ValueError):
+        referencia(df, artefatos)
+#
+#------------------- FIM DOS TESTES DO CODIFICADOR ------------------------+
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+#------------------- TESTES DO ARMAZENAMENTO DO FORMULÁRIO ----------------------+
+#
+# FormDataStore com uma planilha CSV local (sem rede e sem thread de
+# atualização): junção incremental por carimbo, IDs repetidos, consultas
+# em lote com IDs ausentes e a leitura em blocos do modo 'scan'.
+#
+#   python -m pytest -q test_form_store.py
+#
+import pandas as pd
+import pytest
+
+from form_store import COLUNA_CARIMBO, N_PERGUNTAS, FormDataStore
+
+PERGUNTAS = [f"Col{i:02d}" for i in range(1, N_PERGUNTAS + 1)]
+
+
+def carimbo(minuto):
+    return f"01/03/2024 10:{minuto:02d}:00"
+
+
+def linhas(minutos, resposta='Sim'):
+    return [{COLUNA_CARIMBO: carimbo(m), **{c: resposta for c in PERGUNTAS}} for m in minutos]
+
+
+def escrever(caminho, registros, acrescentar=False):
+    pd.DataFrame(registros).to_csv(caminho, index=False, mode='a' if acrescentar else 'w',
+                                   header=not acrescentar)
+    return str(caminho)
+
+
+def criar_store(caminho, **kwargs):
+    downloads = []
+    kwargs.setdefault('min_refresh_interval', 0)
+    store = FormDataStore(caminho, refresh_interval=0,
+                          on_fetch=lambda n_bytes, n_linhas, s: downloads.append(n_linhas), **kwargs)
+    return store, downloads
+
+
+def test_refresh_incorpora_so_carimbos_mais_novos(tmp_path):
+    caminho = escrever(tmp_path / 'planilha.csv', linhas([1, 2, 3]))
+    store, _ = criar_store(caminho)
+    assert store.refresh() == 3
+
+    # Uma linha nova, uma com carimbo anterior ao último conhecido e uma já vista
+    escrever(caminho, linhas([4]) + linhas([0]) + linhas([2], resposta='Não'), acrescentar=True)
+    assert store.refresh() == 1
+    assert store.ids() == [carimbo(m) for m in (1, 2, 3, 4)]
+    assert store.lookup(carimbo(0)) is None
+    assert store.lookup(carimbo(2))['Col01'].iloc[0] == 'Sim'
+    assert store.lookup_latest() == carimbo(4)
+    assert store.refresh() == 0
+
+
+def test_ids_repetidos_prevalece_a_ultima_linha(tmp_path):
+    caminho = escrever(tmp_path / 'planilha.csv',
+                       linhas([1]) + linhas([2], resposta='Não') + linhas([2], resposta='Sim'))
+    store, _ = criar_store(caminho)
+    assert store.refresh() == 2
+    linha = store.lookup(carimbo(2))
+    assert len(linha) == 1
+    assert (linha[PERGUNTAS].iloc[0] == 'Sim').all()
+
+
+def test_get_many_com_ids_ausentes(tmp_path):
+    caminho = escrever(tmp_path / 'planilha.csv', linhas([1, 2, 3]))
+    store, downloads = criar_store(caminho, min_refresh_interval=3600)
+    df = store.get_many([carimbo(3), carimbo(9), carimbo(1)])
+    # Só as encontradas (na ordem da planilha), com um único download
+    assert df.index.tolist() == [carimbo(1), carimbo(3)]
+    assert len(downloads) == 1
+    assert store.get_many([carimbo(9)]).empty
+    assert len(downloads) == 1
+
+
+@pytest.mark.parametrize('alvo, lidas', [(0, 2), (3, 4), (8, 10)])
+def test_scan_para_no_primeiro_bloco_com_o_id(tmp_path, alvo, lidas):
+    caminho = escrever(tmp_path / 'planilha.csv', linhas(range(10)))
+    store, downloads = criar_store(caminho, mode='scan', chunksize=2)
+    df = store.get(carimbo(alvo))
+    assert df.index.tolist() == [carimbo(alvo)]
+    assert downloads == [lidas]
+    assert len(store) == 0
+
+
+def test_scan_id_ausente_percorre_tudo(tmp_path):
+    caminho = escrever(tmp_path / 'planilha.csv', linhas(range(10)))
+    store, downloads = criar_store(caminho, mode='scan', chunksize=3)
+    assert store.get(carimbo(42)) is None
+    assert store.get_many([carimbo(5), carimbo(42)]).index.tolist() == [carimbo(5)]
+    assert store.latest_id() == carimbo(9)
+    assert downloads == [10, 10, 10]
+#
+#------------------- FIM DOS TESTES DO ARMAZENAMENTO ----------------------------+
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+#------------------- TESTES DO MOTOR DE INFERÊNCIA EM NUMPY ----------------------+
+#
+# O backend NumPy precisa dar as mesmas probabilidades que o model.predict do
+# Keras em respostas codificadas de verdade, inclusive nas linhas com idade
+# '?' (NaN na entrada). Requer o TensorFlow (pulado sem ele).
+#
+#   python -m pytest -q test_numpy_model.py
+#
+import os
+
+import numpy as np
+import pytest
+
+from artifacts import BASE_DIR, MODEL_FILE, load_artifacts
+from numpy_model import NumpyDenseModel, check_equivalence
+
+keras_models = pytest.importorskip('tensorflow.keras.models')
+
+
+@pytest.fixture(scope='module')
+def modelos():
+    artefatos = load_artifacts(BASE_DIR, backend='numpy')
+    keras = keras_models.load_model(os.path.join(BASE_DIR, MODEL_FILE))
+    return artefatos, keras
+
+
+def test_backends_iguais_em_respostas_codificadas(modelos):
+    artefatos, keras = modelos
+    assert check_equivalence(artefatos.model, keras, n=500,
+                             feature_encoder=artefatos.feature_encoder) <= 1e-5
+
+
+def test_idade_interrogacao_igual_ao_keras(modelos):
+    artefatos, keras = modelos
+    X = artefatos.feature_encoder.encode(artefatos.feature_encoder.sample_answers(200))
+    com_nan = ~np.isfinite(X).all(axis=1)
+    assert com_nan.any()
+    esperado = keras.predict(X[com_nan], verbose=0)
+    obtido = artefatos.model.predict(X[com_nan])
+    assert np.isfinite(obtido).all()
+    np.testing.assert_allclose(obtido, esperado, atol=1e-5)
+
+
+def test_pesos_somente_leitura(modelos):
+    modelo = modelos[0].model
+    assert isinstance(modelo, NumpyDenseModel)
+    assert not modelo.weights.flags.writeable
+    assert all(not W.flags.writeable for W, _, _ in modelo.layers)
+#
+#------------------- FIM DOS TESTES DO MOTOR DE INFERÊNCIA -----------------------+
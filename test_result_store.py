@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+#------------------- TESTES DO ARMAZENAMENTO DE RESULTADOS ----------------------+
+#
+# Os dois backends (memória e SQLite) com um relógio controlado: ordem do
+# despejo LRU, expiração por TTL, resultados de outra versão dos artefatos
+# ignorados e, no SQLite, linhas de outra versão despejadas primeiro.
+#
+#   python -m pytest -q test_result_store.py
+#
+import pytest
+
+import result_store
+from result_store import create_result_store
+
+
+class Relogio:
+    # Substitui o módulo time em result_store: só time() é usado
+    def __init__(self):
+        self.agora = 1000.0
+
+    def time(self):
+        return self.agora
+
+    def avancar(self, segundos=1.0):
+        self.agora += segundos
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    r = Relogio()
+    monkeypatch.setattr(result_store, 'time', r)
+    return r
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def criar(request, tmp_path, relogio):
+    def criar(**kwargs):
+        return create_result_store(request.param, path=str(tmp_path / 'resultados.db'), **kwargs)
+    return criar
+
+
+def valor(n):
+    return {'Probabilidade': n / 10, 'Classificação': f"faixa {n}"}
+
+
+def test_despejo_lru(criar, relogio):
+    store = criar(max_items=2, version='v1')
+    store.set('a', valor(1))
+    relogio.avancar()
+    store.set('b', valor(2))
+    relogio.avancar()
+    # Leitura renova 'a': o menos usado passa a ser 'b'
+    assert store.get('a') == valor(1)
+    relogio.avancar()
+    store.set('c', valor(3))
+    assert len(store) == 2
+    assert store.get('b') is None
+    assert store.get('a') == valor(1) and store.get('c') == valor(3)
+    assert store.evictions == 1
+
+
+def test_expiracao_por_ttl(criar, relogio):
+    store = criar(ttl=60, version='v1')
+    store['a'] = valor(1)
+    relogio.avancar(59)
+    assert store['a'] == valor(1)
+    # O TTL conta a partir da gravação, não do último acesso
+    relogio.avancar(2)
+    assert 'a' not in store
+    assert len(store) == 0
+    with pytest.raises(KeyError):
+        store['a']
+
+
+def test_outra_versao_e_ignorada(criar):
+    store = criar(version='v1')
+    store.set('a', valor(1))
+    store.set('b', valor(2), version='v0')
+    assert store.get('b') is None
+    store.version = 'v2'
+    assert store.get('a') is None
+    assert store.get('a', 'padrão') == 'padrão'
+    store.set('a', valor(3))
+    assert store.get('a') == valor(3)
+
+
+def test_sqlite_despeja_outras_versoes_primeiro(tmp_path, relogio):
+    store = create_result_store('sqlite', path=str(tmp_path / 'resultados.db'), max_items=2, version='v1')
+    store.set('a', valor(1))
+    relogio.avancar()
+    # Mais recente, porém de outra versão
+    store.set('velho', valor(0), version='v0')
+    relogio.avancar()
+    store.set('b', valor(2))
+    assert store.evictions == 1
+    assert store.get('a') == valor(1) and store.get('b') == valor(2)
+    store.version = 'v0'
+    assert store.get('velho') is None
+
+
+def test_sqlite_compartilhado_e_preservado_entre_instancias(tmp_path, relogio):
+    caminho = str(tmp_path / 'resultados.db')
+    create_result_store('sqlite', path=caminho, version='v1').set('a', valor(1))
+    outro = create_result_store('sqlite', path=caminho, version='v2')
+    # Outra versão não apaga a linha: um worker ainda na versão antiga a reaproveita
+    assert outro.get('a') is None
+    assert create_result_store('sqlite', path=caminho, version='v1').get('a') == valor(1)
+#
+#------------------- FIM DOS TESTES DO ARMAZENAMENTO DE RESULTADOS -------------+
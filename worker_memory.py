@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+#------------------- MEMÓRIA DOS WORKERS ----------------------+
+#
+# Com o gunicorn em modo preload (gunicorn.conf.py), os artefatos são
+# carregados uma única vez no processo mestre e os workers herdam as páginas
+# por copy-on-write. Para que elas continuem compartilhadas:
+#   - o backend NumPy dispensa o TensorFlow (cujo runtime não sobrevive ao
+#     fork e ocupa centenas de MB por worker);
+#   - os pesos ficam num único buffer somente leitura (NumpyDenseModel);
+#   - freeze_heap() move os objetos já criados para a geração permanente do
+#     coletor de lixo, que assim não escreve nos cabeçalhos deles (e não
+#     duplica as páginas) a cada coleta nos workers.
+#
+# Relatório por worker (RSS, PSS, compartilhado e privado), a partir do
+# /proc do Linux:
+#
+#   python worker_memory.py <pid do mestre do gunicorn>
+#
+import argparse
+import gc
+import os
+
+CAMPOS_SMAPS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty')
+
+
+def freeze_heap():
+    """Coleta e congela o heap atual (chamar no mestre, logo antes do fork)."""
+    gc.collect()
+    gc.freeze()
+    return gc.get_freeze_count()
+
+
+def memory_usage(pid='self'):
+    """Uso de memória (bytes) de um processo; {} fora do Linux.
+
+    ``shared`` e ``private`` somam as páginas limpas e sujas; o PSS divide
+    cada página compartilhada pelo número de processos que a mapeiam, então
+    a soma dos PSS dos workers é a memória realmente ocupada por eles.
+    """
+    uso = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for linha in f:
+                partes = linha.split()
+                if len(partes) == 3 and partes[0].rstrip(':') in CAMPOS_SMAPS:
+                    uso[partes[0].rstrip(':').lower()] = int(partes[1]) * 1024
+    except OSError:
+        # Kernels sem smaps_rollup (< 4.14): só o RSS do /proc/<pid>/status
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                for linha in f:
+                    if linha.startswith('VmRSS:'):
+                        uso['rss'] = int(linha.split()[1]) * 1024
+        except OSError:
+            return {}
+    if 'shared_clean' in uso:
+        uso['shared'] = uso.pop('shared_clean') + uso.pop('shared_dirty')
+        uso['private'] = uso.pop('private_clean') + uso.pop('private_dirty')
+    return uso
+
+
+def child_pids(pid):
+    filhos = []
+    try:
+        for tarefa in os.listdir(f'/proc/{pid}/task'):
+            with open(f'/proc/{pid}/task/{tarefa}/children') as f:
+                filhos += [int(p) for p in f.read().split()]
+    except OSError:
+        pass
+    return sorted(set(filhos))
+
+
+def format_report(processos):
+    """Tabela (MB) de [(rótulo, uso)] com a linha de totais."""
+    mb = lambda v: f"{v / 2**20:9.1f}" if v is not None else f"{'-':>9}"
+    colunas = ('rss', 'pss', 'shared', 'private')
+    linhas = [f"{'processo':<16}" + ''.join(f"{c:>9}" for c in colunas) + "   (MB)"]
+    for rotulo, uso in processos:
+        linhas.append(f"{rotulo:<16}" + ''.join(mb(uso.get(c)) for c in colunas))
+    totais = {c: sum(uso.get(c, 0) for _, uso in processos) for c in colunas}
+    linhas.append(f"{'total':<16}" + ''.join(mb(totais[c]) for c in colunas))
+    return '\n'.join(linhas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memória por worker de um servidor pré-fork.")
+    parser.add_argument('pid', type=int, help="pid do processo mestre (ex.: gunicorn)")
+    args = parser.parse_args(argv)
+    processos = [(f'mestre {args.pid}', memory_usage(args.pid))]
+    processos += [(f'worker {p}', memory_usage(p)) for p in child_pids(args.pid)]
+    print(format_report(processos))
+
+
+if __name__ == '__main__':
+    main()
+#
+#------------------- FIM DA MEMÓRIA DOS WORKERS ---------------+